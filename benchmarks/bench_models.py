@@ -0,0 +1,137 @@
+"""Koszt parsowania: modele (models.py) vs dotychczasowe chodzenie po dictach.
+
+Uruchomienie (bez Home Assistanta):  python benchmarks/bench_models.py
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_models():
+    # models.py nie zależy od HA – ładujemy go bez importu pakietu integracji
+    path = ROOT / "custom_components" / "smart_lunch" / "models.py"
+    spec = importlib.util.spec_from_file_location("smart_lunch_models", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+models = _load_models()
+
+
+# --- dotychczasowe parsowanie (kopia sprzed warstwy modeli) ---
+
+def legacy_places(dp: dict[str, Any] | None) -> tuple[list[tuple[int, str]], int | None]:
+    options: list[tuple[int, str]] = []
+    server_default_id: int | None = None
+    for comp in (dp or {}).get("companies_delivery_places", []) or []:
+        for loc in comp.get("delivery_places", []) or []:
+            pid = loc.get("id")
+            if pid is None:
+                continue
+            name = loc.get("name_pl") or loc.get("name") or f"Place {pid}"
+            options.append((int(pid), name))
+            if server_default_id is None and loc.get("default") is True:
+                server_default_id = int(pid)
+    return options, server_default_id
+
+
+def legacy_dates(dd: dict[str, Any] | None) -> dict[str, list[str]]:
+    by_day: dict[str, list[str]] = {}
+    for item in (dd or {}).get("delivery_dates", []) or []:
+        d = item.get("date")
+        if not d:
+            continue
+        by_day[d] = [h for h in (item.get("hours", []) or []) if isinstance(h, str)]
+    return by_day
+
+
+def legacy_funding(payload: dict[str, Any] | None) -> dict[str, Any]:
+    fs = (payload or {}).get("funding_setting") or {}
+    avail = fs.get("available_fundings") or {}
+    return {"daily_cents": avail.get("daily_cents"), "monthly_cents": avail.get("monthly_cents")}
+
+
+# --- syntetyczne payloady ---
+
+def make_places(companies: int = 5, per_company: int = 20) -> dict[str, Any]:
+    return {
+        "companies_delivery_places": [
+            {
+                "delivery_places": [
+                    {"id": c * 100 + i, "name_pl": f"Miejsce {c}-{i}", "default": c == 0 and i == 3}
+                    for i in range(per_company)
+                ]
+            }
+            for c in range(companies)
+        ]
+    }
+
+
+def make_dates(days: int = 30, hours: int = 6, distinct: bool = False) -> dict[str, Any]:
+    """distinct=True: każdy dzień ma inne godziny (najgorszy przypadek dla współdzielonych krotek)."""
+    return {
+        "delivery_dates": [
+            {
+                "date": f"2026-{1 + d // 28:02d}-{1 + d % 28:02d}",
+                "hours": [f"{11 + h // 2}:{(h % 2) * 30 + (d if distinct else 0):02d}" for h in range(hours)],
+            }
+            for d in range(days)
+        ]
+    }
+
+
+FUNDING = {"funding_setting": {"available_fundings": {"daily_cents": 2500, "monthly_cents": 40000}}}
+
+
+def bench(label: str, fn, number: int) -> float:
+    per_call = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<34} {per_call * 1e6:9.2f} µs/call")
+    return per_call
+
+
+def retained(label: str, build) -> None:
+    tracemalloc.start()
+    objs = [build() for _ in range(100)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    print(f"  {label:<34} {size / 100 / 1024:9.2f} KiB/obj")
+
+
+def main() -> None:
+    places, dates, distinct_dates = make_places(), make_dates(), make_dates(distinct=True)
+
+    print("delivery_places (100 miejsc)")
+    bench("dict walk", lambda: legacy_places(places), 2000)
+    bench("DeliveryPlaces.from_api", lambda: models.DeliveryPlaces.from_api(places), 2000)
+
+    print("delivery_dates (30 dni × 6 godzin)")
+    bench("dict walk", lambda: legacy_dates(dates), 2000)
+    bench("DeliveryDates.from_api", lambda: models.DeliveryDates.from_api(dates), 2000)
+
+    print("funding_settings")
+    bench("dict walk", lambda: legacy_funding(FUNDING), 200000)
+    bench("Funding.from_api", lambda: models.Funding.from_api(FUNDING), 200000)
+
+    print("pamięć zatrzymana po parsowaniu")
+    retained("places: dict walk", lambda: legacy_places(places))
+    retained("places: DeliveryPlaces", lambda: models.DeliveryPlaces.from_api(places))
+    retained("dates: dict walk", lambda: legacy_dates(dates))
+    retained("dates: DeliveryDates", lambda: models.DeliveryDates.from_api(dates))
+    retained("dates (różne godziny): dict walk", lambda: legacy_dates(distinct_dates))
+    retained("dates (różne godziny): model", lambda: models.DeliveryDates.from_api(distinct_dates))
+    retained("funding: dict", lambda: legacy_funding(FUNDING))
+    retained("funding: Funding", lambda: models.Funding.from_api(FUNDING))
+
+
+if __name__ == "__main__":
+    main()
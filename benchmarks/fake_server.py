@@ -0,0 +1,224 @@
+"""Lokalny zastępnik API SmartLunch (aiohttp) do benchmarków – bez dotykania prawdziwego serwisu.
+
+Serwuje nagrane, zanonimizowane odpowiedzi z benchmarks/fixtures:
+  GET  /                                   strona z meta csrf-token (token per sesja, reszta strony dopełniona)
+  POST /users/sign_in                      logowanie (X-CSRF-Token; nowa sesja + remember_user_token)
+  GET  /employees/api/v1/users             walidacja sesji
+  GET  /employees/api/v1/funding_settings/{day}
+  GET  /employees/api/v1/delivery_places
+  GET  /employees/api/v3/delivery_dates?delivery_place_id=…
+  GET  /employees/api/v3/menu?delivery_place_id=…&date=…
+
+Konfigurowalne: opóźnienie, odsetek błędów (status do wyboru), wymuszone 401,
+ETag / 304 dla zapytań warunkowych, kompresja JSON. Liczniki zapytań per ścieżka w `hits`.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+API = "/employees/api"
+
+
+def load_fixture(name: str) -> Any:
+    path = FIXTURES / name
+    text = path.read_text(encoding="utf-8")
+    return json.loads(text) if path.suffix == ".json" else text
+
+
+def rebase_delivery_dates(payload: dict[str, Any], today: date) -> dict[str, Any]:
+    """Przesuń nagrane daty tak, by pierwsza wypadała dziś (kalendarz zawsze „aktualny”)."""
+    items = payload.get("delivery_dates") or []
+    if not items:
+        return payload
+    shift = today - date.fromisoformat(items[0]["date"])
+    return {
+        **payload,
+        "delivery_dates": [
+            {**item, "date": (date.fromisoformat(item["date"]) + shift).isoformat()} for item in items
+        ],
+    }
+
+
+def make_remember_token(expires: datetime) -> str:
+    """remember_user_token w formacie Rails (base64 JSON z _rails.exp + "--podpis")."""
+    body = json.dumps({"_rails": {"message": "YmVuY2g=", "exp": expires.strftime("%Y-%m-%dT%H:%M:%S.000Z")}})
+    return base64.urlsafe_b64encode(body.encode()).decode().rstrip("=") + "--" + "0" * 40
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.0          # s, stałe opóźnienie każdej odpowiedzi
+    jitter: float = 0.0           # s, dodatkowe losowe opóźnienie [0, jitter]
+    error_rate: float = 0.0       # odsetek zapytań API kończących się error_status
+    error_status: int = 503
+    retry_after: int | None = None
+    unauthorized: bool = False    # każde zapytanie API → 401 (do czasu ponownego logowania)
+    etags: bool = True            # ETag + 304 dla If-None-Match
+    compress: bool = True         # gzip/br odpowiedzi JSON wg Accept-Encoding klienta
+    token_ttl: timedelta = timedelta(days=14)
+    home_padding: int = 64 * 1024  # B treści strony '/' za </head> (pakiet SPA jak na produkcji)
+    check_csrf: bool = True       # logowanie bez pasującego X-CSRF-Token → 422 (jak Rails)
+
+
+class FakeSmartLunch:
+    """Serwer testowy; `async with FakeSmartLunch() as fake:` → fake.base do SmartLunchClient."""
+
+    def __init__(self, config: FakeConfig | None = None, seed: int = 0) -> None:
+        self.config = config or FakeConfig()
+        self.hits: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self._sessions = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.base = ""
+        today = date.today()
+        self.fixtures: dict[str, Any] = {
+            "home": load_fixture("home.html"),
+            "users": load_fixture("users.json"),
+            "funding": load_fixture("funding_settings.json"),
+            "places": load_fixture("delivery_places.json"),
+            "dates": rebase_delivery_dates(load_fixture("delivery_dates.json"), today),
+            "menu": load_fixture("menu.json"),
+        }
+
+    # --- cykl życia ---
+
+    async def start(self) -> str:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/", self._home)
+        app.router.add_post("/users/sign_in", self._sign_in)
+        app.router.add_get(f"{API}/v1/users", self._users)
+        app.router.add_get(f"{API}/v1/funding_settings/{{day}}", self._funding)
+        app.router.add_get(f"{API}/v1/delivery_places", self._places)
+        app.router.add_get(f"{API}/v3/delivery_dates", self._dates)
+        app.router.add_get(f"{API}/v3/menu", self._menu)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "localhost", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        # "localhost", nie IP – CookieJar aiohttp (unsafe=False) odrzuca ciastka dla adresów IP
+        self.base = f"http://localhost:{port}"
+        return self.base
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> FakeSmartLunch:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    def cookies(self, session: str = "bench-session") -> dict[str, str]:
+        """Ciastka jak po udanym logowaniu – do entry.data["cookies"] w benchmarku setupu."""
+        return {
+            "_smartlunch_session": session,
+            "remember_user_token": make_remember_token(datetime.now(timezone.utc) + self.config.token_ttl),
+        }
+
+    # --- obsługa ---
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.hits[request.path] += 1
+        delay = self.config.latency + self._random.uniform(0, self.config.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if request.path.startswith(API):
+            if self.config.unauthorized or "_smartlunch_session" not in request.cookies:
+                return web.json_response({"error": "unauthorized"}, status=401)
+            if self.config.error_rate and self._random.random() < self.config.error_rate:
+                headers = {"Retry-After": str(self.config.retry_after)} if self.config.retry_after else None
+                return web.json_response({"error": "bench"}, status=self.config.error_status, headers=headers)
+        response = await handler(request)
+        if response.body is not None:
+            self.bytes_sent += len(response.body)
+        return response
+
+    def _json(self, request: web.Request, payload: Any) -> web.Response:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {}
+        if self.config.etags:
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            headers["ETag"] = etag
+        response = web.Response(body=body, content_type="application/json", headers=headers)
+        if self.config.compress:
+            response.enable_compression()
+        return response
+
+    def _new_session(self) -> str:
+        self._sessions += 1
+        return f"bench-session-{self._sessions}"
+
+    @staticmethod
+    def _csrf_for(session: str) -> str:
+        return "csrf-" + hashlib.blake2b(session.encode(), digest_size=12).hexdigest()
+
+    async def _home(self, request: web.Request) -> web.Response:
+        session = request.cookies.get("_smartlunch_session")
+        new_session = session is None
+        if new_session:
+            session = self._new_session()
+        html = self.fixtures["home"].replace("bench-csrf-token-0000000000000000", self._csrf_for(session))
+        if self.config.home_padding:
+            filler = "<script>/*" + "x" * self.config.home_padding + "*/</script>"
+            html = html.replace("</body>", filler + "</body>")
+        response = web.Response(text=html, content_type="text/html")
+        if new_session:
+            response.set_cookie("_smartlunch_session", session, path="/")
+        return response
+
+    async def _sign_in(self, request: web.Request) -> web.Response:
+        session = request.cookies.get("_smartlunch_session")
+        if self.config.check_csrf and (
+            session is None or request.headers.get("X-CSRF-Token") != self._csrf_for(session)
+        ):
+            return web.json_response({"error": "ActionController::InvalidAuthenticityToken"}, status=422)
+        payload = await request.json()
+        user = (payload or {}).get("user") or {}
+        if not user.get("login") or not user.get("password"):
+            return web.json_response({"success": False}, status=401)
+        self.config.unauthorized = False
+        response = web.json_response({"success": True})
+        # jak Devise: po zalogowaniu nowa sesja (a więc i nowy token CSRF)
+        for key, value in self.cookies(self._new_session()).items():
+            response.set_cookie(key, value, path="/")
+        return response
+
+    async def _users(self, request: web.Request) -> web.Response:
+        return self._json(request, self.fixtures["users"])
+
+    async def _funding(self, request: web.Request) -> web.Response:
+        return self._json(request, self.fixtures["funding"])
+
+    async def _places(self, request: web.Request) -> web.Response:
+        return self._json(request, self.fixtures["places"])
+
+    async def _dates(self, request: web.Request) -> web.Response:
+        if "delivery_place_id" not in request.query:
+            return web.json_response({"error": "delivery_place_id required"}, status=422)
+        return self._json(request, self.fixtures["dates"])
+
+    async def _menu(self, request: web.Request) -> web.Response:
+        if "delivery_place_id" not in request.query or "date" not in request.query:
+            return web.json_response({"error": "delivery_place_id and date required"}, status=422)
+        return self._json(request, self.fixtures["menu"])
@@ -0,0 +1,368 @@
+"""Benchmarki integracji na lokalnym zastępniku API (fake_server.py) z bazami w baselines.json.
+
+Uruchomienie z katalogu repo:
+  python benchmarks/run.py                      # wszystkie zestawy, porównanie z bazą
+  python benchmarks/run.py --suite parse client # wybrane zestawy
+  python benchmarks/run.py --update-baseline    # zapisz bieżące wyniki jako bazę
+
+Zestawy:
+  parse    koszt parsowania payloadów z fixtures (models.py)            – bez zależności
+  client   opóźnienie wywołań SmartLunchClient (zimne / 304 / coalescing) – aiohttp + HA
+  polling  model liczby zapytań na entry na godzinę z harmonogramu       – HA
+  setup    czas async_setup_entry (zimny i ciepły start ze snapshotu)    – pytest-homeassistant-custom-component
+
+Wszystkie metryki: mniej = lepiej. Wynik > baza × (1 + tolerancja) → regresja, kod wyjścia 1.
+Przy porównaniu metryka bez bazy albo zestaw pominięty (brak zależności) też daje kod wyjścia 1;
+zestawy, których nie da się uruchomić, wyklucza się jawnie przez --suite.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import timeit
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+BASELINES = HERE / "baselines.json"
+DEFAULT_TOLERANCE = 0.5  # ta sama wartość co "tolerance" w baselines.json
+
+sys.path.insert(0, str(ROOT))
+
+EMAIL = "jan.kowalski@example.com"
+PLACE_ID = 5101
+
+
+class SuiteSkipped(Exception):
+    """Brak opcjonalnej zależności zestawu."""
+
+
+def _fixture(name: str) -> Any:
+    return json.loads((HERE / "fixtures" / name).read_text(encoding="utf-8"))
+
+
+def _ms(samples: list[float]) -> tuple[float, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return round(statistics.median(ordered) * 1000, 3), round(p95 * 1000, 3)
+
+
+# --- parse ---
+
+def suite_parse(args: argparse.Namespace) -> dict[str, float]:
+    from bench_models import models
+
+    payloads = {
+        "delivery_places": (models.DeliveryPlaces.from_api, _fixture("delivery_places.json")),
+        "delivery_dates": (models.DeliveryDates.from_api, _fixture("delivery_dates.json")),
+        "funding_settings": (models.Funding.from_api, _fixture("funding_settings.json")),
+        "menu": (models.Menu.from_api, _fixture("menu.json")),
+    }
+    # ponowne parsowanie względem poprzedniego menu (pozycje bez zmian → te same obiekty)
+    menu = models.Menu.from_api(payloads["menu"][1])
+    payloads["menu.incremental"] = (lambda p: models.Menu.from_api(p, menu), payloads["menu"][1])
+    number = 2000 if args.quick else 20000
+    out: dict[str, float] = {}
+    for name, (parse, payload) in payloads.items():
+        per_call = min(timeit.repeat(lambda: parse(payload), number=number, repeat=5)) / number
+        out[f"parse.{name}.us"] = round(per_call * 1e6, 3)
+    return out
+
+
+# --- client ---
+
+async def _timed(call: Callable[[], Awaitable[Any]], iterations: int, before: Callable[[], None]) -> list[float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        before()
+        t0 = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+async def _client_suite(args: argparse.Namespace) -> dict[str, float]:
+    try:
+        from fake_server import FakeConfig, FakeSmartLunch
+        from custom_components.smart_lunch.api import SmartLunchClient, create_client_session
+    except ImportError as e:
+        raise SuiteSkipped(str(e)) from e
+
+    iterations = 20 if args.quick else 200
+    out: dict[str, float] = {}
+    async with FakeSmartLunch(FakeConfig(latency=args.latency)) as fake:
+        session = create_client_session()
+        try:
+            client = SmartLunchClient(None, EMAIL, "bench", fake.base, session=session)
+
+            logins = max(5, iterations // 10)
+            samples = await _timed(client.login, logins, lambda: None)
+            out["client.login.p50_ms"], out["client.login.p95_ms"] = _ms(samples)
+            # ile strony '/' czyta preflight CSRF na jedno logowanie
+            out["client.login.home_bytes"] = float(client.metrics.endpoints["home"].bytes_received / logins)
+            client.attach_cookies(fake.cookies())
+
+            today = date.today().isoformat()
+            calls = {
+                "delivery_places": client.fetch_delivery_places,
+                "delivery_dates": lambda: client.fetch_delivery_dates(PLACE_ID),
+                "funding": lambda: client.fetch_funding_for_day(today),
+                "menu": lambda: client.fetch_menu(PLACE_ID, today),
+            }
+
+            def _cold() -> None:
+                client._recent.clear()
+                client.response_cache.clear()
+
+            def _revalidate() -> None:
+                # bez wyniku single-flight, z cache warunkowym → 304
+                client._recent.clear()
+
+            for name, call in calls.items():
+                samples = await _timed(call, iterations, _cold)
+                out[f"client.{name}.cold.p50_ms"], out[f"client.{name}.cold.p95_ms"] = _ms(samples)
+                samples = await _timed(call, iterations, _revalidate)
+                out[f"client.{name}.304.p50_ms"], out[f"client.{name}.304.p95_ms"] = _ms(samples)
+
+            # bajty na drucie (Content-Length po kompresji) na jedno pełne pobranie
+            for name, call in calls.items():
+                _cold()
+                stats = client.metrics.endpoints
+                before_bytes = sum(e.bytes_received for e in stats.values())
+                await call()
+                out[f"client.{name}.wire_bytes"] = float(sum(e.bytes_received for e in stats.values()) - before_bytes)
+
+            # 20 współbieżnych identycznych GET-ów → ile zapytań dotarło do serwera
+            _cold()
+            path = "/employees/api/v1/delivery_places"
+            before = fake.hits[path]
+            await asyncio.gather(*(client.fetch_delivery_places() for _ in range(20)))
+            out["client.coalesced_20.server_hits"] = float(fake.hits[path] - before)
+        finally:
+            await session.close()
+    return out
+
+
+def suite_client(args: argparse.Namespace) -> dict[str, float]:
+    return asyncio.run(_client_suite(args))
+
+
+# --- polling ---
+
+def suite_polling(args: argparse.Namespace) -> dict[str, float]:
+    """Model zapytań z harmonogramu: interwały z polling.adaptive_interval, TTL cache jak w integracji.
+
+    Dane z fixtures się nie zmieniają, więc seria „bez zmian” rośnie jak w spokojnym tygodniu.
+    Liczy zapytania do serwera (304 też jest zapytaniem), symulując tydzień od poniedziałku.
+    """
+    try:
+        from homeassistant.util import dt as dt_util
+        from fake_server import rebase_delivery_dates
+        from custom_components.smart_lunch.const import DELIVERY_DATES_TTL, FUNDING_TTL
+        from custom_components.smart_lunch.polling import adaptive_interval
+    except ImportError as e:
+        raise SuiteSkipped(str(e)) from e
+
+    today = dt_util.now().date()
+    monday = today - timedelta(days=today.weekday())
+    start = dt_util.start_of_local_day(monday)
+    end = start + timedelta(days=7)
+    dates = rebase_delivery_dates(_fixture("delivery_dates.json"), monday)["delivery_dates"]
+    by_day = {d["date"]: d["hours"] for d in dates}
+
+    def _simulate(base: timedelta, hot: bool, on_refresh: Callable[[datetime], int]) -> int:
+        requests, streak, t = 0, 0, start
+        while t < end:
+            requests += on_refresh(t)
+            streak += 1
+            t += adaptive_interval(base, t, by_day, streak, hot)
+        return requests
+
+    # miejsca: każde odświeżenie = 1 zapytanie (warunkowe)
+    places = _simulate(timedelta(minutes=15), False, lambda t: 1)
+
+    # daty: cache DELIVERY_DATES_TTL
+    last_dates: list[datetime | None] = [None]
+
+    def _dates(t: datetime) -> int:
+        if last_dates[0] is None or (t - last_dates[0]).total_seconds() >= DELIVERY_DATES_TTL:
+            last_dates[0] = t
+            return 1
+        return 0
+
+    days = _simulate(timedelta(minutes=15), True, _dates)
+
+    # dofinansowanie: dziś + prefetch przyszłych dni dostaw, cache FUNDING_TTL per dzień
+    last_funding: dict[str, datetime] = {}
+
+    def _funding(t: datetime) -> int:
+        local_day = dt_util.as_local(t).date().isoformat()
+        wanted = [local_day] + [d for d in by_day if d >= local_day]
+        count = 0
+        for day in dict.fromkeys(wanted):
+            last = last_funding.get(day)
+            if last is None or (t - last).total_seconds() >= FUNDING_TTL:
+                last_funding[day] = t
+                count += 1
+        return count
+
+    funding = _simulate(timedelta(minutes=30), True, _funding)
+
+    hours = (end - start).total_seconds() / 3600
+    return {
+        "polling.places.req_per_hour": round(places / hours, 3),
+        "polling.delivery_dates.req_per_hour": round(days / hours, 3),
+        "polling.funding.req_per_hour": round(funding / hours, 3),
+        "polling.total.req_per_entry_per_hour": round((places + days + funding) / hours, 3),
+    }
+
+
+# --- setup ---
+
+async def _setup_suite(args: argparse.Namespace) -> dict[str, float]:
+    try:
+        from fake_server import FakeConfig, FakeSmartLunch
+        # common przed loader: samodzielny import homeassistant.loader kończy się cyklem importów
+        from pytest_homeassistant_custom_component.common import (
+            MockConfigEntry,
+            async_test_home_assistant,
+        )
+        from homeassistant import loader
+        from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+        from custom_components.smart_lunch.const import DOMAIN
+    except ImportError as e:
+        raise SuiteSkipped(str(e)) from e
+
+    runs = 3 if args.quick else 10
+    cold: list[float] = []
+    warm: list[float] = []
+    requests: list[float] = []
+    async with FakeSmartLunch(FakeConfig(latency=args.latency)) as fake:
+        for _ in range(runs):
+            async with async_test_home_assistant() as hass:
+                # odpowiednik fixture enable_custom_integrations
+                hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+                entry = MockConfigEntry(
+                    domain=DOMAIN,
+                    data={"email": EMAIL, "base": fake.base, "cookies": fake.cookies()},
+                )
+                entry.add_to_hass(hass)
+
+                hits = sum(fake.hits.values())
+                t0 = time.perf_counter()
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                await hass.async_block_till_done()
+                cold.append(time.perf_counter() - t0)
+                requests.append(sum(fake.hits.values()) - hits)
+
+                # zapisz snapshot (opóźniony zapis Store, jak przy zatrzymaniu HA) i wczytaj ponownie → ciepły start
+                hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+                await hass.async_block_till_done()
+                await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+                t0 = time.perf_counter()
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                warm.append(time.perf_counter() - t0)
+                await hass.async_block_till_done()
+                await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+
+    out: dict[str, float] = {}
+    out["setup.cold.p50_ms"], out["setup.cold.p95_ms"] = _ms(cold)
+    out["setup.warm.p50_ms"], out["setup.warm.p95_ms"] = _ms(warm)
+    out["setup.cold.server_requests"] = float(statistics.median(requests))
+    return out
+
+
+def suite_setup(args: argparse.Namespace) -> dict[str, float]:
+    return asyncio.run(_setup_suite(args))
+
+
+SUITES: dict[str, Callable[[argparse.Namespace], dict[str, float]]] = {
+    "parse": suite_parse,
+    "client": suite_client,
+    "polling": suite_polling,
+    "setup": suite_setup,
+}
+
+
+# --- bazy ---
+
+def load_baselines() -> dict[str, Any]:
+    if not BASELINES.exists():
+        return {"tolerance": DEFAULT_TOLERANCE, "metrics": {}}
+    return json.loads(BASELINES.read_text(encoding="utf-8"))
+
+
+# metryki deterministyczne (liczby zapytań) – bez tolerancji
+EXACT_SUFFIXES = ("server_hits", "server_requests", "req_per_hour", "req_per_entry_per_hour", "bytes")
+
+
+def compare(results: dict[str, float], baselines: dict[str, Any], tolerance: float) -> list[str]:
+    """Lista regresji (metryka > baza × (1 + tolerancja) albo metryka bez bazy)."""
+    regressions: list[str] = []
+    metrics = baselines.get("metrics") or {}
+    for name, value in sorted(results.items()):
+        base = metrics.get(name)
+        if base is None:
+            regressions.append(f"{name}: brak bazy (python benchmarks/run.py --update-baseline)")
+            print(f"  {name:<44} {value:>12}   (brak bazy)")
+            continue
+        allowed = 0.0 if name.endswith(EXACT_SUFFIXES) else tolerance
+        limit = base * (1 + allowed)
+        status = "OK"
+        if value > limit:
+            status = "REGRESJA"
+            regressions.append(f"{name}: {value} > {base} (+{allowed:.0%})")
+        print(f"  {name:<44} {value:>12}   baza {base:<10} {status}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", nargs="*", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--update-baseline", action="store_true", help="zapisz wyniki jako bazę")
+    parser.add_argument("--tolerance", type=float, default=None, help="dopuszczalny wzrost (domyślnie z pliku bazy)")
+    parser.add_argument("--latency", type=float, default=0.0, help="opóźnienie fake serwera (s)")
+    parser.add_argument("--quick", action="store_true", help="mniej iteracji (np. w CI)")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    tolerance = args.tolerance if args.tolerance is not None else baselines.get("tolerance", DEFAULT_TOLERANCE)
+
+    results: dict[str, float] = {}
+    regressions: list[str] = []
+    for name in args.suite:
+        print(f"[{name}]")
+        try:
+            suite_results = SUITES[name](args)
+        except SuiteSkipped as e:
+            print(f"  pominięty: {e}")
+            regressions.append(f"zestaw {name} pominięty: {e}")
+            continue
+        results.update(suite_results)
+        regressions.extend(compare(suite_results, baselines, tolerance))
+
+    if args.update_baseline:
+        baselines.setdefault("tolerance", tolerance)
+        baselines.setdefault("metrics", {}).update(results)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Zapisano bazę: {BASELINES.relative_to(ROOT)}")
+        return 0
+
+    for line in regressions:
+        print(f"!! {line}")
+    if regressions:
+        print(f"{len(regressions)} problemów względem {BASELINES.relative_to(ROOT)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
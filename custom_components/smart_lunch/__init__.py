@@ -1,28 +1,106 @@
 # custom_components/smart_lunch/__init__.py
 from __future__ import annotations
 
+from functools import partial
+from typing import Mapping, Sequence
+
+import voluptuous as vol
 from yarl import URL
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, SupportsResponse, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .api import SmartLunchClient, create_client_session
+from .cache import DeliveryDatesCache, FundingCache, MenuCache
+from .const import (
+    CONF_LEDGER_BACKFILL,
+    DATA_PROFILER,
+    DATA_SCHEDULER,
+    DOMAIN,
+    MENU_ENABLED,
+    OPT_SELECTED_DAY,
+    OPT_SELECTED_PLACE_ID,
+    PLATFORMS,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_MAX_DURATION,
+    SERVICE_PROFILE,
+)
+from .coordinator import (
+    SmartLunchDeliveryDaysCoordinator,
+    SmartLunchDeliveryHoursCoordinator,
+    SmartLunchDeliveryPlacesCoordinator,
+    SmartLunchFundingCoordinator,
+    SmartLunchMenuCoordinator,
+    SmartLunchMetricsCoordinator,
+    SmartLunchTokenCoordinator,
+    async_refresh_all,
+)
+from .ledger import SmartLunchFundingLedger
+from .models import Funding
+from .planner import SmartLunchRefreshPlanner
+from .polling import AdaptivePollingPolicy
+from .profiler import SmartLunchProfiler, async_handle_profile
+from .scheduler import SmartLunchRequestScheduler
+from .selection import SmartLunchSelection
+from .session import SmartLunchSessionManager
+from .snapshot import SmartLunchSnapshot
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("duration", default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional("memory", default=False): cv.boolean,
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Serwisy domeny (niezależne od entry): smart_lunch.profile."""
+    profiler = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_PROFILER, SmartLunchProfiler())
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        partial(async_handle_profile, hass, profiler),
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
 
-from .api import SmartLunchClient
-from .const import DOMAIN, PLATFORMS
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    session = async_get_clientsession(hass, verify_ssl=True)
+    # własna sesja (izolowane ciastka + pula połączeń) – zamykana przy unload, a przy
+    # zatrzymaniu HA (entry nie są wtedy unloadowane) na EVENT_HOMEASSISTANT_CLOSE
+    session = create_client_session()
+    entry.async_on_unload(session.close)
+
+    async def _async_close_session(_event: Event) -> None:
+        await session.close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session))
     email: str = entry.data["email"]
     base: str = entry.data.get("base")
 
     client = SmartLunchClient(hass, email, None, base, session=session)
+    # jeden harmonogram na domenę: limit per host i sprawiedliwa kolejka między kontami
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SCHEDULER not in domain_data:
+        domain_data[DATA_SCHEDULER] = SmartLunchRequestScheduler()
+    client.set_scheduler(domain_data[DATA_SCHEDULER], owner=entry.entry_id)
+    client.set_profiler(domain_data.get(DATA_PROFILER))
+
+    # ciche odnawianie sesji (jeśli użytkownik zapamiętał hasło)
+    session_manager = SmartLunchSessionManager(hass, entry, client)
 
     cookies: dict[str, str] = entry.data.get("cookies", {})
     if cookies:
         client.attach_cookies(cookies)
-        if not await client.validate_session():
-            raise ConfigEntryAuthFailed("Session expired")
-    else:
+    elif not await session_manager.async_renew():
         raise ConfigEntryAuthFailed("No session; reauth required")
 
     base_url = URL(client.base)
@@ -36,19 +114,178 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "model": "API",                             # opcjonalnie
     }
 
+    # lokalne wybory selectów – własny Store z opóźnionym zapisem (nie entry.options)
+    selection = SmartLunchSelection(hass, entry)
+    await selection.async_load()
+
+    # wspólny koordynator miejsc dostawy – subskrybują go sensor.py i select.py
+    places_coordinator = SmartLunchDeliveryPlacesCoordinator(hass, client)
+    dates_cache = DeliveryDatesCache(client)  # place_id → DeliveryDates
+    day_coordinator = SmartLunchDeliveryDaysCoordinator(hass, selection, places_coordinator, dates_cache)
+    hour_coordinator = SmartLunchDeliveryHoursCoordinator(hass, selection, places_coordinator, dates_cache)
+    funding_cache = FundingCache(client)  # "YYYY-MM-DD" → dofinansowanie
+    funding_coordinator = SmartLunchFundingCoordinator(hass, entry, client, funding_cache)
+    token_coordinator = SmartLunchTokenCoordinator(hass, client)
+    coordinators = {
+        "places_coordinator": places_coordinator,
+        "funding_coordinator": funding_coordinator,
+        "token_coordinator": token_coordinator,
+        "day_coordinator": day_coordinator,
+        "hour_coordinator": hour_coordinator,
+    }
+    # menu (coordinator + select "Danie") dopiero po potwierdzeniu endpointu i schematu (const.MENU_PATH)
+    menu_cache: MenuCache | None = None
+    if MENU_ENABLED:
+        menu_cache = MenuCache(client)  # (place_id, "YYYY-MM-DD") → Menu
+        coordinators["menu_coordinator"] = SmartLunchMenuCoordinator(
+            hass, entry, selection, places_coordinator, dates_cache, menu_cache
+        )
+    # metryki API i odświeżeń → sensory diagnostyczne (poza snapshotem i grafem startu)
+    for coordinator in coordinators.values():
+        coordinator.metrics = client.metrics
+        coordinator.profiler = client.profiler
+    metrics_coordinator = SmartLunchMetricsCoordinator(hass, client.metrics)
+
+    # ciepły start: ostatnie dobre dane ze Store od razu, świeże w tle
+    snapshot = SmartLunchSnapshot(hass, entry.entry_id)
+    warm = await snapshot.async_restore(coordinators, dates_cache)
+
+    if not warm and cookies:
+        # bez snapshotu sprawdzamy sesję od razu (przy ciepłym starcie zrobi to pierwszy fetch w tle)
+        if not await client.validate_session() and not await session_manager.async_renew():
+            raise ConfigEntryAuthFailed("Session expired")
+
+    session_manager.async_start()
+    entry.async_on_unload(session_manager.async_stop)
+    # expiry tokenu przychodzi zdarzeniowo (zmiana ciastek), bez odpytywania co 5 min
+    entry.async_on_unload(token_coordinator.async_start())
+
+    # kaskada selectów: zmiana miejsca/dnia → jeden plan odświeżeń tylko zależnych węzłów
+    planner = SmartLunchRefreshPlanner(hass, coordinators)
+    entry.async_on_unload(planner.async_stop)
+    entry.async_on_unload(
+        selection.async_add_listener((OPT_SELECTED_PLACE_ID, OPT_SELECTED_DAY), planner.async_schedule)
+    )
+
+    # godziny czytają ten sam cache co daty → przelicz je po każdej aktualizacji dat;
+    # dofinansowanie dla wszystkich dni dostaw pobieramy z wyprzedzeniem w tle
+    @callback
+    def _on_days_updated() -> None:
+        # odświeżenie dni z planu kaskady – godziny i menu są dalej w tym samym planie
+        if not planner.is_refreshing("day_coordinator"):
+            planner.async_schedule(("day_coordinator",))
+        funding_coordinator.async_prefetch_lookahead()
+
+    entry.async_on_unload(day_coordinator.async_add_listener(_on_days_updated))
+
+    # miejsce zniknęło z listy serwera → jego daty w cache są już nieaktualne
+    @callback
+    def _on_places_updated() -> None:
+        known = (places_coordinator.data or {}).get("id_to_name") or {}
+        if not known:
+            return
+        for place_id in dates_cache.place_ids():
+            if place_id not in known:
+                dates_cache.invalidate(place_id)
+
+    entry.async_on_unload(places_coordinator.async_add_listener(_on_places_updated))
+
+    # interwały z kalendarza dostaw: częściej w oknie dostaw, rzadko w nocy / bez dostaw / bez zmian
+    def _delivery_schedule() -> Mapping[str, Sequence[str]] | None:
+        place_id = (day_coordinator.data or {}).get("place_id")
+        dates = dates_cache.peek(place_id) if place_id is not None else None
+        return dates.hours_by_day if dates else None
+
+    polling_policy = AdaptivePollingPolicy(_delivery_schedule)
+    for name in ("places_coordinator", "funding_coordinator", "day_coordinator", "menu_coordinator"):
+        if name in coordinators:
+            coordinators[name].async_set_interval_policy(polling_policy)
+
+    funding_coordinator.lookahead_days = lambda: (day_coordinator.data or {}).get("dates") or []
+    # zmiana doby o lokalnej północy zamiast czekania na interwał
+    entry.async_on_unload(funding_coordinator.async_schedule_rollover())
+
+    # księga dofinansowania: migawka dnia po każdej świeżej aktualizacji → statystyki długoterminowe
+    ledger = SmartLunchFundingLedger(hass, entry.entry_id, client)
+    await ledger.async_load()
+
+    @callback
+    def _on_funding_updated() -> None:
+        data = funding_coordinator.data or {}
+        if data.get("source_day") and not data.get("stale"):
+            ledger.async_record(data["source_day"], Funding(data.get("daily_cents"), data.get("monthly_cents")))
+
+    entry.async_on_unload(funding_coordinator.async_add_listener(_on_funding_updated))
+    entry.async_on_unload(ledger.async_stop)
+    for unsub in snapshot.async_track(coordinators, dates_cache):
+        entry.async_on_unload(unsub)
+
+    # równoległy start: funding / miejsca / token naraz, daty zaraz po miejscach
+    if warm:
+        entry.async_create_background_task(
+            hass, async_refresh_all(coordinators, first_refresh=False), "smart_lunch_warm_start"
+        )
+    else:
+        await async_refresh_all(coordinators)
+    await metrics_coordinator.async_refresh()
+    # backfill minionych dni tylko na wyraźną zgodę (opcje entry) – semantyka funding_settings/{dzień}
+    # dla przeszłych dni nie jest potwierdzona, a statystyki długoterminowe zostają na stałe
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+    _async_start_ledger_backfill(hass, entry, ledger)
+
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
         "client": client,
         "device_info": device_info,  # 👈 udostępniamy platformom
+        "session_manager": session_manager,
+        "selection": selection,
+        "refresh_planner": planner,
+        "snapshot": snapshot,
+        "delivery_dates": dates_cache,
+        "funding_cache": funding_cache,
+        "ledger": ledger,
+        CONF_LEDGER_BACKFILL: bool(entry.options.get(CONF_LEDGER_BACKFILL)),
+        **({"menu_cache": menu_cache} if menu_cache is not None else {}),
+        "metrics_coordinator": metrics_coordinator,
+        **coordinators,
     }
 
     if PLATFORMS:
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
+@callback
+def _async_start_ledger_backfill(hass: HomeAssistant, entry: ConfigEntry, ledger: SmartLunchFundingLedger) -> None:
+    if entry.options.get(CONF_LEDGER_BACKFILL) and ledger.needs_backfill:
+        entry.async_create_background_task(hass, ledger.async_backfill(), "smart_lunch_ledger_backfill")
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Włączenie backfillu w opcjach → start bez przeładowania entry.
+
+    Listener odpala się przy każdym async_update_entry (ciasteczka sesji, migracja
+    wyboru), więc backfill rusza tylko przy przejściu opcji z False na True.
+    """
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if not data or "ledger" not in data:
+        return
+    enabled = bool(entry.options.get(CONF_LEDGER_BACKFILL))
+    was_enabled = data.get(CONF_LEDGER_BACKFILL, False)
+    data[CONF_LEDGER_BACKFILL] = enabled
+    if enabled and not was_enabled:
+        _async_start_ledger_backfill(hass, entry, data["ledger"])
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if PLATFORMS:
         unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     else:
         unload_ok = True
     hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
-    return unload_ok
\ No newline at end of file
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Usunięcie entry → usuń też jego snapshot, wybory i księgę dofinansowania (ze statystykami)."""
+    await SmartLunchSnapshot(hass, entry.entry_id).async_remove()
+    await SmartLunchSelection(hass, entry).async_remove()
+    await SmartLunchFundingLedger(hass, entry.entry_id).async_remove()
@@ -1,19 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
+import logging
+import random
 import re
+import time
 import urllib.parse
+from contextlib import asynccontextmanager, nullcontext
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import (
+    ClientConnectionError,
+    ClientResponse,
+    ClientResponseError,
+    ClientSession,
+    ClientTimeout,
+    CookieJar,
+    TCPConnector,
+)
 from yarl import URL
 from homeassistant.const import __version__ as HA_VERSION
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.util.ssl import get_default_context
 
 from .const import (
     DEFAULT_BASE,
@@ -21,11 +37,36 @@ from .const import (
     USERS_ME_PATH,
     USER_AGENT,
     COOKIE_KEYS,
+    CSRF_CHUNK_SIZE,
+    CSRF_MAX_BYTES,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT_PER_HOST,
     HTTP_TIMEOUT,
+    IDEMPOTENT_METHODS,
+    REQUEST_DEADLINE,
+    REQUEST_RESULT_TTL,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_STATUSES,
 )
+from .decoding import ACCEPT_ENCODING, decode_json, read_body
+from .http_cache import ResponseCache, body_digest
+from .metrics import ApiMetrics, RequestObservation, endpoint_name
+from .profiler import SmartLunchProfiler, measure
+from .models import DeliveryPlaces
+from .scheduler import SmartLunchRequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
 
 # identyczny wzorzec jak w starym kodzie
 META_CSRF_RE = re.compile(r'<meta\s+name="csrf-token"\s+content="([^"]+)"', re.I)
+# ten sam wzorzec na bajtach – szukanie w strumieniu bez dekodowania całej strony
+META_CSRF_BYTES_RE = re.compile(META_CSRF_RE.pattern.encode(), re.I)
+HEAD_END_RE = re.compile(rb"</head\s*>", re.I)
+# ile bajtów poprzedniej porcji przeszukać ponownie (znacznik przecięty granicą porcji)
+_CSRF_SCAN_OVERLAP = 512
 
 
 def _b64_fix_padding(s: str) -> bytes:
@@ -34,7 +75,9 @@ def _b64_fix_padding(s: str) -> bytes:
     return base64.urlsafe_b64decode(s2.encode("utf-8"))
 
 
+@lru_cache(maxsize=16)
 def decode_remember_token_expiry(token_value: str) -> Optional[datetime]:
+    """Expiry z remember_user_token (memoizowane – token zmienia się tylko przy logowaniu)."""
     try:
         raw_unquoted = urllib.parse.unquote_plus(token_value)
         first = raw_unquoted.split("--", 1)[0]
@@ -48,12 +91,80 @@ def decode_remember_token_expiry(token_value: str) -> Optional[datetime]:
     return None
 
 
+def _request_key(method: str, url: str, params: Any) -> tuple[str, str, tuple[tuple[str, str], ...]]:
+    """Klucz single-flight: metoda + URL + (posortowane) parametry."""
+    if isinstance(params, dict):
+        frozen = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    elif params:
+        frozen = tuple((str(k), str(v)) for k, v in params)
+    else:
+        frozen = ()
+    return method.upper(), url, frozen
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After: liczba sekund albo data HTTP → sekundy oczekiwania (None gdy brak/niepoprawne)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Wykładniczy backoff z limitem i pełnym jitterem (attempt liczone od 1)."""
+    cap = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+def create_client_session() -> ClientSession:
+    """
+    Własna sesja HTTP dla jednego konta (entry / config flow):
+    - izolowany cookie_jar (attach_cookies nie czyści ciastek innym kontom ani HA)
+    - keep-alive, limit połączeń per host i cache DNS dla ciepłych połączeń
+    Właściciel sesji odpowiada za jej zamknięcie (session.close()).
+    """
+    connector = TCPConnector(
+        ssl=get_default_context(),
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+    )
+    return ClientSession(connector=connector, cookie_jar=CookieJar())
+
+
 @dataclass
 class AuthState:
     csrf: Optional[str] = None
     token_exp: Optional[datetime] = None
 
 
+async def read_csrf_token(response: ClientResponse) -> tuple[str | None, int]:
+    """Czytaj stronę porcjami tylko do znacznika csrf-token (albo końca <head>).
+
+    Zwraca (token albo None, liczba przeczytanych bajtów). Reszty strony nie pobieramy.
+    """
+    buf = bytearray()
+    scanned = 0
+    async for chunk in response.content.iter_chunked(CSRF_CHUNK_SIZE):
+        buf += chunk
+        start = max(0, scanned - _CSRF_SCAN_OVERLAP)
+        m = META_CSRF_BYTES_RE.search(buf, start)
+        if m:
+            return m.group(1).decode("ascii", errors="replace"), len(buf)
+        if HEAD_END_RE.search(buf, start) or len(buf) >= CSRF_MAX_BYTES:
+            break
+        scanned = len(buf)
+    return None, len(buf)
+
+
 class SmartLunchClient:
     """Minimalny klient do logowania i walidacji sesji (async), wierny zachowaniu starego kodu."""
 
@@ -80,22 +191,81 @@ class SmartLunchClient:
             hass, verify_ssl=True
         )
         self.auth = AuthState()
+        # single-flight: zapytania w locie i krótko żyjące wyniki (klucz → (czas, wynik))
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._recent: dict[tuple, tuple[float, Any]] = {}
+        # cache warunkowy (ETag / Last-Modified / skrót treści) dla GET-ów API
+        self.response_cache = ResponseCache()
+        # liczniki zapytań / opóźnień / statusów (sensory diagnostyczne)
+        self.metrics = ApiMetrics()
+        self.profiler: SmartLunchProfiler | None = None
+        # ciche odnowienie sesji po 401/403/419 (ustawiane przez SmartLunchSessionManager)
+        self._session_renewer: Callable[[], Awaitable[bool]] | None = None
+        # wspólny dla domeny limiter per host (ustawiany w __init__ integracji)
+        self._scheduler: SmartLunchRequestScheduler | None = None
+        self._scheduler_owner = email.lower()
+        # słuchacze zmian ciastek sesji (login / odnowienie / attach) – dostają remember_user_token
+        self._cookie_listeners: list[Callable[[str | None], None]] = []
         self._headers = {
             "User-Agent": f"{USER_AGENT} (HA {HA_VERSION})",
             "Accept": "application/json",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+
+    def set_password(self, password: str | None) -> None:
+        """Ustaw hasło transientnie (np. na czas cichego odnowienia sesji)."""
+        self._password = password
+
+    def set_session_renewer(self, renewer: Callable[[], Awaitable[bool]] | None) -> None:
+        """Callback wołany raz po 401/403/419; True = sesja odnowiona, ponów zapytanie."""
+        self._session_renewer = renewer
+
+    def set_profiler(self, profiler: SmartLunchProfiler | None) -> None:
+        """Podłącz profiler domeny (serwis smart_lunch.profile); poza sesją bez kosztu."""
+        self.profiler = profiler
+
+    def footprint(self) -> dict[str, int]:
+        """Liczność struktur trzymanych przez klienta (raport profilowania)."""
+        return {
+            "response_cache_entries": len(self.response_cache),
+            "recent_results": len(self._recent),
+            "inflight_requests": len(self._inflight),
+            "latency_samples": sum(len(s.latencies) for s in self.metrics.endpoints.values()),
         }
 
+    def set_scheduler(self, scheduler: SmartLunchRequestScheduler | None, owner: str | None = None) -> None:
+        """Podłącz wspólny harmonogram zapytań; owner = klucz sprawiedliwej kolejki (entry)."""
+        self._scheduler = scheduler
+        if owner:
+            self._scheduler_owner = owner
+
+    @asynccontextmanager
+    async def _observe(self, endpoint: str) -> AsyncIterator[RequestObservation]:
+        """Pomiar jednego zapytania do metryk; wołający ustawia status i liczbę bajtów."""
+        obs = RequestObservation()
+        started = asyncio.get_running_loop().time()
+        cancelled = False
+        try:
+            yield obs
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # anulowanie przed odpowiedzią to nie błąd serwera – nie liczymy
+            if not (cancelled and obs.status is None):
+                latency = asyncio.get_running_loop().time() - started
+                self.metrics.record_request(endpoint, obs.status, latency, obs.nbytes)
+
     async def _preflight_csrf(self) -> None:
-        """Zachowanie jak w starym kodzie: pobierz CSRF z '/'."""
+        """Pobierz CSRF z '/' – strumieniowo, tylko do znacznika csrf-token (reszty strony nie czytamy)."""
         try:
-            async with self.session.get(
+            async with self._observe("home") as obs, self.session.get(
                 f"{self.base}/",
                 timeout=ClientTimeout(total=HTTP_TIMEOUT),
                 headers={"User-Agent": self._headers["User-Agent"]},
             ) as r:
-                text = await r.text()
-                m = META_CSRF_RE.search(text)
-                self.auth.csrf = m.group(1) if m else None
+                obs.status = r.status
+                self.auth.csrf, obs.nbytes = await read_csrf_token(r)
         except Exception:
             self.auth.csrf = None
 
@@ -128,12 +298,13 @@ class SmartLunchClient:
 
         # 2) POST logowania
         payload = {"user": {"login": self.email, "password": self._password}}
-        async with self.session.post(
+        async with self._observe(endpoint_name(LOGIN_PATH)) as obs, self.session.post(
             f"{self.base}{LOGIN_PATH}",
             headers=self._headers_json(),
             data=json.dumps(payload).encode("utf-8"),
             timeout=ClientTimeout(total=HTTP_TIMEOUT),
         ) as r:
+            obs.status = r.status
             resp_json: dict[str, Any] | None = None
             ctype = r.headers.get("Content-Type", "")
             if ctype.startswith("application/json"):
@@ -159,6 +330,7 @@ class SmartLunchClient:
 
             token_exp = decode_remember_token_expiry(jar.get("remember_user_token", ""))
             self.auth.token_exp = token_exp
+            self._notify_cookies_changed()
             return {
                 "cookies": {k: v for k, v in jar.items() if k in COOKIE_KEYS},
                 "remember_exp": token_exp.isoformat() if token_exp else None,
@@ -166,11 +338,12 @@ class SmartLunchClient:
 
     async def validate_session(self) -> bool:
         try:
-            async with self.session.get(
+            async with self._observe(endpoint_name(USERS_ME_PATH)) as obs, self.session.get(
                 f"{self.base}{USERS_ME_PATH}",
                 headers=self._headers,
                 timeout=ClientTimeout(total=HTTP_TIMEOUT),
             ) as r:
+                obs.status = r.status
                 return r.status == 200 and (
                     r.headers.get("Content-Type", "").startswith("application/json")
                 )
@@ -180,28 +353,194 @@ class SmartLunchClient:
     def attach_cookies(self, cookies: dict[str, str]) -> None:
         """Wstaw znane ciastka do cookie_jar (jak w starym kodzie, ale poprawnie dla aiohttp)."""
         self.session.cookie_jar.clear()
+        self._recent.clear()  # wyniki poprzedniej sesji nie są już miarodajne
+        self.response_cache.clear()
         # wszystkie na raz; bazowy URL jako yarl.URL (wymagane przez aiohttp)
         self.session.cookie_jar.update_cookies(cookies, response_url=self.base_url)
+        self._notify_cookies_changed()
+
+    def remember_token(self) -> str | None:
+        """Aktualna wartość remember_user_token z cookie_jar (albo None)."""
+        for c in self.session.cookie_jar:
+            if c.key == "remember_user_token":
+                return c.value
+        return None
+
+    def async_add_cookie_listener(self, listener: Callable[[str | None], None]) -> Callable[[], None]:
+        """Powiadamiaj o zmianie ciastek sesji; zwraca funkcję odpinającą."""
+        self._cookie_listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._cookie_listeners:
+                self._cookie_listeners.remove(listener)
+
+        return _remove
+
+    def _notify_cookies_changed(self) -> None:
+        if not self._cookie_listeners:
+            return
+        token = self.remember_token()
+        for listener in list(self._cookie_listeners):
+            listener(token)
 
     async def _request_json(self, method: str, path: str, **kwargs: Any) -> Any:
         """
-        Pomocniczy wrapper do przyszłych wywołań API:
-        - 401/403/419 → ConfigEntryAuthFailed (HA uruchomi reauth)
+        Pomocniczy wrapper do wywołań API:
+        - identyczne GET-y (metoda + URL + params) w locie współdzielą jedno zapytanie,
+          a wynik jest jeszcze przez REQUEST_RESULT_TTL s zwracany kolejnym wołającym
+        - GET-y są warunkowe; niezmieniony zasób = ten sam obiekt co poprzednio
+        - 429/5xx i błędy sieci → ponowienia z backoffem (patrz _do_request_json)
+        - 401/403/419 → jedno ciche odnowienie sesji (jeśli włączone), potem
+          ConfigEntryAuthFailed (HA uruchomi reauth)
         - inne błędy → raise_for_status
         """
+        with measure(self.profiler, "request", f"{method.upper()} {endpoint_name(path)}"):
+            return await self._request_json_coalesced(method, path, **kwargs)
+
+    async def _request_json_coalesced(self, method: str, path: str, **kwargs: Any) -> Any:
         url = f"{self.base}{path}"
-        async with self.session.request(
+        # coalescing tylko dla idempotentnych GET bez dodatkowych argumentów poza params
+        if method.upper() != "GET" or set(kwargs) - {"params"}:
+            return await self._do_request_json(method, url, **kwargs)
+
+        key = _request_key(method, url, kwargs.get("params"))
+        now = time.monotonic()
+        cached = self._recent.get(key)
+        if cached is not None and now - cached[0] < REQUEST_RESULT_TTL:
+            self.metrics.record_cache_hit(endpoint_name(path), "recent")
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics.record_cache_hit(endpoint_name(path), "coalesced")
+        else:
+            task = asyncio.get_running_loop().create_task(
+                self._do_request_json(method, url, **kwargs)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_request_done(key, t))
+        # shield: anulowanie jednego wołającego nie przerywa zapytania pozostałym
+        return await asyncio.shield(task)
+
+    def _on_request_done(self, key: tuple, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        now = time.monotonic()
+        # sprzątanie przeterminowanych wpisów, żeby cache nie rósł
+        for k in [k for k, (ts, _) in self._recent.items() if now - ts >= REQUEST_RESULT_TTL]:
+            del self._recent[k]
+        self._recent[key] = (now, task.result())
+
+    async def _do_request_json(self, method: str, url: str, **kwargs: Any) -> Any:
+        """
+        Zapytanie z polityką ponowień (tylko metody idempotentne):
+        - statusy z RETRY_STATUSES oraz błędy połączenia/timeouty → ponowienie
+        - wykładniczy backoff z jitterem, Retry-After respektowane dla 429/503
+        - całość mieści się w REQUEST_DEADLINE s (timeout próby skracany do pozostałego czasu)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + REQUEST_DEADLINE
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        renewed = False
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - loop.time()
+            try:
+                return await self._request_once(
+                    method, url, timeout=min(HTTP_TIMEOUT, max(remaining, 1.0)), **kwargs
+                )
+            except ConfigEntryAuthFailed:
+                # jedno ciche odnowienie sesji; dopiero potem reauth w HA
+                if renewed or self._session_renewer is None or not await self._session_renewer():
+                    raise
+                renewed = True
+                attempt -= 1
+                continue
+            except ClientResponseError as e:
+                if not retryable or e.status not in RETRY_STATUSES or attempt >= RETRY_MAX_ATTEMPTS:
+                    raise
+                delay = _backoff_delay(attempt)
+                if e.status in (429, 503):
+                    retry_after = _parse_retry_after((e.headers or {}).get("Retry-After"))
+                    if retry_after is not None:
+                        delay = retry_after + random.uniform(0, RETRY_BACKOFF_BASE)
+                err: Exception = e
+            except (ClientConnectionError, asyncio.TimeoutError) as e:
+                if not retryable or attempt >= RETRY_MAX_ATTEMPTS:
+                    raise
+                delay = _backoff_delay(attempt)
+                err = e
+
+            if loop.time() + delay >= deadline:
+                # nie zdążymy przed deadline – nie ma sensu czekać
+                raise err
+            self.metrics.record_retry(endpoint_name(url[len(self.base):]))
+            _LOGGER.debug(
+                "%s %s nieudane (%s), próba %s/%s za %.1f s",
+                method, url, err, attempt + 1, RETRY_MAX_ATTEMPTS, delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def _request_once(self, method: str, url: str, timeout: float, **kwargs: Any) -> Any:
+        """
+        Jedno zapytanie HTTP (w slocie wspólnego harmonogramu, jeśli podłączony).
+        Dla GET zapytanie jest warunkowe (If-None-Match /
+        If-Modified-Since); przy 304 albo identycznym skrócie treści zwracany jest
+        poprzedni obiekt bez ponownego dekodowania JSON.
+        """
+        headers = self._headers
+        key: tuple | None = None
+        if method.upper() == "GET":
+            key = _request_key(method, url, kwargs.get("params"))
+            headers = {**self._headers, **self.response_cache.conditional_headers(key)}
+
+        endpoint = endpoint_name(url[len(self.base):])
+        host_scheduler = self._scheduler.host(self.base_url.host or "") if self._scheduler else None
+        slot = host_scheduler.slot(self._scheduler_owner) if host_scheduler else nullcontext()
+        # pomiar dopiero po uzyskaniu slotu – opóźnienie serwera, nie czas w kolejce
+        async with slot, self._observe(endpoint) as obs, self.session.request(
             method,
             url,
-            headers=self._headers,
-            timeout=ClientTimeout(total=HTTP_TIMEOUT),
+            headers=headers,
+            timeout=ClientTimeout(total=timeout),
             **kwargs,
         ) as r:
+            obs.status = r.status
+            if host_scheduler:
+                host_scheduler.report(r.status)
             if r.status in (401, 403, 419):
                 raise ConfigEntryAuthFailed("Session expired")
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            if key is not None and r.status == 304 and self.response_cache.get(key) is not None:
+                self.metrics.record_cache_hit(endpoint, "304")
+                return self.response_cache.not_modified(key, etag, last_modified)
             r.raise_for_status()
-            return await r.json()
-        
+            body = await read_body(r)
+            # Content-Length to bajty „na drucie” (po kompresji); bez niego – treść po dekompresji
+            obs.nbytes = r.content_length or len(body)
+            if key is None:
+                return await self._decode(endpoint, body)
+
+            digest = body_digest(body)
+            unchanged, data = self.response_cache.lookup_body(key, digest, etag, last_modified)
+            if unchanged:
+                self.metrics.record_cache_hit(endpoint, "unchanged")
+                return data
+            data = await self._decode(endpoint, body)
+            self.response_cache.store(key, data, digest, etag, last_modified)
+            return data
+
+    async def _decode(self, endpoint: str, body: bytes) -> Any:
+        """json_loads z HA (duże treści poza pętlą zdarzeń); czas dekodowania do metryk i profilera."""
+        data, elapsed, off_loop = await decode_json(self.hass, body)
+        self.metrics.record_decode(endpoint, elapsed, off_loop)
+        if self.profiler is not None:
+            self.profiler.record("decode", endpoint, elapsed, {"bytes": len(body), "off_loop": off_loop})
+        return data
+
     async def fetch_funding_for_day(self, day_iso: str) -> dict[str, Any]:
         from .const import FUNDING_PATH_TPL
         path = FUNDING_PATH_TPL.format(day=day_iso)
@@ -214,19 +553,17 @@ class SmartLunchClient:
 
     @staticmethod
     def choose_default_delivery_place_id(dp_json: dict[str, Any]) -> int | None:
-        """Wybierz domyślne place_id z odpowiedzi API."""
-        for comp in (dp_json or {}).get("companies_delivery_places", []) or []:
-            for dp in comp.get("delivery_places", []) or []:
-                if dp.get("default") is True:
-                    return dp.get("id")
-        # fallback: pierwszy z listy
-        for comp in (dp_json or {}).get("companies_delivery_places", []) or []:
-            arr = comp.get("delivery_places", []) or []
-            if arr:
-                return arr[0].get("id")
-        return None
-    
+        """Wybierz domyślne place_id z odpowiedzi API (flaga "default", fallback: pierwsze z listy)."""
+        return DeliveryPlaces.from_api(dp_json).default_id
+
     async def fetch_delivery_dates(self, delivery_place_id: int) -> dict[str, Any]:
         """Pobierz dostępne daty (i godziny) dla danego miejsca dostawy."""
         from .const import DELIVERY_DATES_PATH
-        return await self._request_json("GET", DELIVERY_DATES_PATH, params={"delivery_place_id": delivery_place_id})
\ No newline at end of file
+        return await self._request_json("GET", DELIVERY_DATES_PATH, params={"delivery_place_id": delivery_place_id})
+
+    async def fetch_menu(self, delivery_place_id: int, day_iso: str) -> dict[str, Any]:
+        """Pobierz menu dla miejsca dostawy i dnia."""
+        from .const import MENU_PATH
+        return await self._request_json(
+            "GET", MENU_PATH, params={"delivery_place_id": delivery_place_id, "date": day_iso}
+        )
@@ -0,0 +1,257 @@
+# custom_components/smart_lunch/cache.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Iterable
+
+from .api import SmartLunchClient
+from .const import (
+    DELIVERY_DATES_TTL,
+    FUNDING_PREFETCH_CONCURRENCY,
+    FUNDING_TTL,
+    MENU_PREFETCH_CONCURRENCY,
+    MENU_TTL,
+)
+from .models import DeliveryDates, Funding, Menu
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _key_lock(locks: dict[Any, asyncio.Lock], key: Any) -> asyncio.Lock:
+    """Lock pobierania dla klucza – tworzony tylko przy pierwszym chybieniu."""
+    lock = locks.get(key)
+    if lock is None:
+        lock = locks[key] = asyncio.Lock()
+    return lock
+
+
+class DeliveryDatesCache:
+    """Cache sparsowanych dat dostawy per miejsce: place_id → DeliveryDates (date → hours).
+
+    Selecty dnia i godziny czytają z jednego payloadu; zmiana dnia nie robi
+    żadnego zapytania, bo godziny są już w pobranych danych.
+    """
+
+    def __init__(self, client: SmartLunchClient, ttl: float = DELIVERY_DATES_TTL) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._entries: dict[int, tuple[float, DeliveryDates]] = {}
+        self._payloads: dict[int, Any] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, place_id: int) -> DeliveryDates | None:
+        """Ostatnio pobrane dane dla miejsca (bez względu na wiek) albo None."""
+        cached = self._entries.get(int(place_id))
+        return cached[1] if cached else None
+
+    def place_ids(self) -> list[int]:
+        return list(self._entries)
+
+    def is_fresh(self, place_id: int) -> bool:
+        cached = self._entries.get(int(place_id))
+        return cached is not None and time.monotonic() - cached[0] < self.ttl
+
+    async def async_get(self, place_id: int, *, allow_stale: bool = False) -> DeliveryDates:
+        """Daty z cache; pobierz z serwera tylko, gdy brak wpisu lub minął TTL."""
+        place_id = int(place_id)
+        if self.is_fresh(place_id) or (allow_stale and place_id in self._entries):
+            return self._entries[place_id][1]
+
+        async with _key_lock(self._locks, place_id):
+            # ktoś mógł pobrać dane, gdy czekaliśmy na lock
+            if self.is_fresh(place_id):
+                return self._entries[place_id][1]
+            dd = await self.client.fetch_delivery_dates(place_id)
+            cached = self._entries.get(place_id)
+            if cached is not None and dd is self._payloads.get(place_id):
+                # niezmieniona odpowiedź (304 / ten sam skrót) – zachowaj sparsowany obiekt
+                dates = cached[1]
+            else:
+                dates = DeliveryDates.from_api(dd)
+                self._payloads[place_id] = dd
+            self._entries[place_id] = (time.monotonic(), dates)
+            return dates
+
+    def dump(self) -> dict[str, dict[str, list[str]]]:
+        """Zawartość cache do snapshotu (klucze jako str – JSON)."""
+        return {str(pid): dates.as_mapping() for pid, (_, dates) in self._entries.items()}
+
+    def restore(self, data: dict[str, dict[str, list[str]]]) -> None:
+        """Wczytaj dane ze snapshotu jako przeterminowane (peek działa, async_get pobierze świeże)."""
+        expired = time.monotonic() - self.ttl
+        for pid, by_day in (data or {}).items():
+            self._entries.setdefault(int(pid), (expired, DeliveryDates.from_mapping(by_day)))
+
+    def invalidate(self, place_id: int | None = None) -> None:
+        """Unieważnij wpis dla miejsca (albo cały cache, gdy place_id=None)."""
+        if place_id is None:
+            self._entries.clear()
+            self._payloads.clear()
+            self._locks.clear()
+        else:
+            self._entries.pop(int(place_id), None)
+            self._payloads.pop(int(place_id), None)
+            self._locks.pop(int(place_id), None)
+
+
+class FundingCache:
+    """Cache dofinansowania per dzień: "YYYY-MM-DD" → Funding.
+
+    Oprócz dzisiejszego dnia trzyma z wyprzedzeniem dni dostaw (async_prefetch),
+    więc dofinansowanie dla wybranej daty jest dostępne bez zapytania na żądanie.
+    """
+
+    def __init__(self, client: SmartLunchClient, ttl: float = FUNDING_TTL) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, Funding]] = {}
+        self._payloads: dict[str, Any] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, day: str) -> Funding | None:
+        cached = self._entries.get(day)
+        return cached[1] if cached else None
+
+    def payload(self, day: str) -> Any:
+        """Ostatni surowy payload dla dnia (ten sam obiekt = brak zmian)."""
+        return self._payloads.get(day)
+
+    def is_fresh(self, day: str) -> bool:
+        cached = self._entries.get(day)
+        return cached is not None and time.monotonic() - cached[0] < self.ttl
+
+    async def async_get(self, day: str) -> Funding:
+        """Dofinansowanie na dzień; zapytanie tylko, gdy brak wpisu lub minął TTL dnia."""
+        if self.is_fresh(day):
+            return self._entries[day][1]
+        async with _key_lock(self._locks, day):
+            if self.is_fresh(day):
+                return self._entries[day][1]
+            payload = await self.client.fetch_funding_for_day(day)
+            cached = self._entries.get(day)
+            if cached is not None and payload is self._payloads.get(day):
+                funding = cached[1]
+            else:
+                funding = Funding.from_api(payload)
+                self._payloads[day] = payload
+            self._entries[day] = (time.monotonic(), funding)
+            return funding
+
+    async def async_prefetch(
+        self, days: Iterable[str], concurrency: int = FUNDING_PREFETCH_CONCURRENCY
+    ) -> None:
+        """Pobierz w tle brakujące/przeterminowane dni (ograniczona współbieżność)."""
+        missing = [d for d in dict.fromkeys(days) if not self.is_fresh(d)]
+        if not missing:
+            return
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(day: str) -> None:
+            async with sem:
+                try:
+                    await self.async_get(day)
+                except Exception as e:
+                    _LOGGER.debug("Prefetch dofinansowania dla %s nieudany: %s", day, e)
+
+        await asyncio.gather(*(_one(d) for d in missing))
+        for listener in list(self._listeners):
+            listener()
+
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Powiadamiaj o nowych danych z prefetchu; zwraca funkcję odpinającą."""
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def prune(self, before: str) -> None:
+        """Usuń dni wcześniejsze niż `before` (ISO) – wołane przy zmianie doby."""
+        for day in [d for d in self._entries if d < before]:
+            self._entries.pop(day, None)
+            self._payloads.pop(day, None)
+            self._locks.pop(day, None)
+
+
+class MenuCache:
+    """Cache menu per (place_id, "YYYY-MM-DD") → Menu.
+
+    Po TTL pytamy serwer warunkowo (ETag w ResponseCache klienta): 304 zwraca
+    ten sam payload i zachowujemy sparsowane menu bez zmian. Zmieniona treść jest
+    parsowana względem poprzedniego menu – niezmienione pozycje pozostają tymi
+    samymi obiektami (Menu.changed = id faktycznie zmienionych).
+    """
+
+    def __init__(self, client: SmartLunchClient, ttl: float = MENU_TTL) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._entries: dict[tuple[int, str], tuple[float, Menu]] = {}
+        self._payloads: dict[tuple[int, str], Any] = {}
+        self._locks: dict[tuple[int, str], asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, place_id: int, day: str) -> Menu | None:
+        cached = self._entries.get((int(place_id), day))
+        return cached[1] if cached else None
+
+    def is_fresh(self, place_id: int, day: str) -> bool:
+        cached = self._entries.get((int(place_id), day))
+        return cached is not None and time.monotonic() - cached[0] < self.ttl
+
+    async def async_get(self, place_id: int, day: str) -> Menu:
+        """Menu z cache; zapytanie (warunkowe) tylko, gdy brak wpisu lub minął TTL."""
+        key = (int(place_id), day)
+        if self.is_fresh(*key):
+            return self._entries[key][1]
+        async with _key_lock(self._locks, key):
+            if self.is_fresh(*key):
+                return self._entries[key][1]
+            payload = await self.client.fetch_menu(*key)
+            cached = self._entries.get(key)
+            if cached is not None and payload is self._payloads.get(key):
+                menu = cached[1]
+            else:
+                menu = Menu.from_api(payload, cached[1] if cached else None)
+                self._payloads[key] = payload
+                if cached is not None:
+                    _LOGGER.debug("Menu %s/%s: zmienione pozycje %s", key[0], day, sorted(menu.changed))
+            self._entries[key] = (time.monotonic(), menu)
+            return menu
+
+    async def async_prefetch(
+        self, place_id: int, days: Iterable[str], concurrency: int = MENU_PREFETCH_CONCURRENCY
+    ) -> None:
+        """Pobierz w tle menu brakujących/przeterminowanych dni (ograniczona współbieżność)."""
+        missing = [d for d in dict.fromkeys(days) if not self.is_fresh(place_id, d)]
+        if not missing:
+            return
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(day: str) -> None:
+            async with sem:
+                try:
+                    await self.async_get(place_id, day)
+                except Exception as e:
+                    _LOGGER.debug("Prefetch menu dla %s/%s nieudany: %s", place_id, day, e)
+
+        await asyncio.gather(*(_one(d) for d in missing))
+
+    def prune(self, before: str) -> None:
+        """Usuń dni wcześniejsze niż `before` (ISO)."""
+        for key in [k for k in self._entries if k[1] < before]:
+            self._entries.pop(key, None)
+            self._payloads.pop(key, None)
+            self._locks.pop(key, None)
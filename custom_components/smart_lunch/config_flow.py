@@ -3,35 +3,54 @@ from __future__ import annotations
 from typing import Any
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import ConfigEntryAuthFailed
 import voluptuous as vol
 
-from .api import SmartLunchClient
-from .const import DOMAIN, DEFAULT_BASE
+from .api import SmartLunchClient, create_client_session
+from .const import CONF_LEDGER_BACKFILL, CONF_PASSWORD, CONF_STORE_PASSWORD, DOMAIN, DEFAULT_BASE
 
 DATA_SCHEMA = vol.Schema(
     {
         vol.Required("email"): str,
         vol.Required("password"): str,
         vol.Optional("base", default=DEFAULT_BASE): str,
+        # opt-in: zapamiętaj hasło, by sesja mogła być odnawiana po cichu
+        vol.Optional(CONF_STORE_PASSWORD, default=False): bool,
+    }
+)
+
+REAUTH_SCHEMA = vol.Schema(
+    {
+        vol.Required("password"): str,
+        vol.Optional(CONF_STORE_PASSWORD, default=False): bool,
     }
 )
 
 
 async def _do_login(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    client = SmartLunchClient(hass, data["email"], data["password"], data["base"])
-    tokens = await client.login()  # ValueError jeśli błąd
-    ok = await client.validate_session()
-    if not ok:
-        raise ValueError("Login ok, ale /users nie zwróciło 200")
-    return tokens
+    # tymczasowa sesja z własnym cookie_jar – logowanie nie dotyka współdzielonej sesji HA
+    session = create_client_session()
+    try:
+        client = SmartLunchClient(hass, data["email"], data["password"], data["base"], session=session)
+        tokens = await client.login()  # ValueError jeśli błąd
+        ok = await client.validate_session()
+        if not ok:
+            raise ValueError("Login ok, ale /users nie zwróciło 200")
+        return tokens
+    finally:
+        await session.close()
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return SmartLunchOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         if user_input is None:
             return self.async_show_form(step_id="user", data_schema=DATA_SCHEMA)
@@ -50,13 +69,15 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         await self.async_set_unique_id(user_input["email"].lower())
         self._abort_if_unique_id_configured()
 
-        # NIE zapisujemy hasła w entry – tylko email, base, cookies
+        # Hasło zapisujemy w entry TYLKO na wyraźną zgodę (ciche odnawianie sesji)
         entry_data = {
             "email": user_input["email"],
             "base": user_input["base"],
             "cookies": tokens.get("cookies", {}),
             "remember_exp": tokens.get("remember_exp"),
         }
+        if user_input.get(CONF_STORE_PASSWORD):
+            entry_data[CONF_PASSWORD] = user_input["password"]
         return self.async_create_entry(
             title=f"SmartLunch ({user_input['email']})",
             data=entry_data,
@@ -75,18 +96,49 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is None:
             return self.async_show_form(
                 step_id="reauth_confirm",
-                data_schema=vol.Schema({vol.Required("password"): str}),
+                data_schema=REAUTH_SCHEMA,
                 description_placeholders={"email": entry.data.get("email", "")},
             )
-        # wykonaj login transientnie
-        client = SmartLunchClient(
-            self.hass, entry.data["email"], user_input["password"], entry.data.get("base", DEFAULT_BASE)
-        )
-        tokens = await client.login()
+        # wykonaj login transientnie (na tymczasowej sesji)
+        session = create_client_session()
+        try:
+            client = SmartLunchClient(
+                self.hass,
+                entry.data["email"],
+                user_input["password"],
+                entry.data.get("base", DEFAULT_BASE),
+                session=session,
+            )
+            tokens = await client.login()
+        finally:
+            await session.close()
         new_data = dict(entry.data)
         new_data["cookies"] = tokens.get("cookies", {})
         new_data["remember_exp"] = tokens.get("remember_exp")
-        # nie zapisujemy password
+        # password tylko na wyraźną zgodę użytkownika
+        if user_input.get(CONF_STORE_PASSWORD):
+            new_data[CONF_PASSWORD] = user_input["password"]
+        else:
+            new_data.pop(CONF_PASSWORD, None)
         self.hass.config_entries.async_update_entry(entry, data=new_data)
         await self.hass.config_entries.async_reload(entry.entry_id)
-        return self.async_abort(reason="reauth_successful")
\ No newline at end of file
+        return self.async_abort(reason="reauth_successful")
+
+
+class SmartLunchOptionsFlow(config_entries.OptionsFlow):
+    """Opcje entry: na razie tylko opt-in backfillu księgi dofinansowania."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self._entry.options, **user_input})
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_LEDGER_BACKFILL, default=self._entry.options.get(CONF_LEDGER_BACKFILL, False)
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 DOMAIN = "smart_lunch"
 PLATFORMS: list[str] = ["sensor", "select"]
 
@@ -7,8 +9,107 @@ USERS_ME_PATH = "/employees/api/v1/users"
 FUNDING_PATH_TPL = "/employees/api/v1/funding_settings/{day}"
 DELIVERY_PLACES_PATH = "/employees/api/v1/delivery_places"
 DELIVERY_DATES_PATH = "/employees/api/v3/delivery_dates"
+# menu dla miejsca i dnia (?delivery_place_id=…&date=YYYY-MM-DD) – ścieżka i schemat NIEPOTWIERDZONE
+# (przyjęte wg wzoru delivery_dates); do potwierdzenia z prawdziwym API menu nie jest włączane w setupie
+MENU_PATH = "/employees/api/v3/menu"
+MENU_ENABLED = False
 
 USER_AGENT = "homeassistant-smartlunch/0.1"
 COOKIE_KEYS = ["_smartlunch_session", "remember_user_token", "lang", "country"]
 HTTP_TIMEOUT = 25
-RETRY_STATUSES = {429, 500, 502, 503, 504}
\ No newline at end of file
+# własna pula połączeń per entry (api.create_client_session)
+HTTP_LIMIT_PER_HOST = 4
+HTTP_DNS_CACHE_TTL = 300      # s
+HTTP_KEEPALIVE_TIMEOUT = 60   # s
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Klucze lokalnych wyborów (select.py) – w Store wyborów (selection.py), dawniej w entry.options
+OPT_SELECTED_PLACE_ID = "selected_delivery_place_id"
+OPT_SELECTED_DAY = "selected_delivery_day"
+OPT_SELECTED_HOUR = "selected_delivery_hour"
+OPT_SELECTED_MENU_ITEM = "selected_menu_item_id"
+SELECTION_STORAGE_VERSION = 1
+SELECTION_SAVE_DELAY = 10  # s, seria kliknięć → jeden zapis na dysk
+CASCADE_DEBOUNCE = 0.3     # s, okno łączenia zmian wyborów w jeden plan odświeżeń (planner.py)
+
+# cache dat dostawy (place_id → {date → hours}); krócej niż interwał koordynatora dni
+DELIVERY_DATES_TTL = 600
+
+# cache dofinansowania per dzień (dziś + dni dostaw z wyprzedzeniem)
+FUNDING_TTL = 1500                # s, krócej niż interwał koordynatora funding
+FUNDING_PREFETCH_CONCURRENCY = 3  # równoległe zapytania przy prefetchu dni dostaw
+
+# cache menu per (place_id, dzień); po TTL zapytanie warunkowe (ETag → 304 bez treści)
+MENU_TTL = 900
+MENU_PREFETCH_DAYS = 3            # tyle kolejnych dni dostaw po wybranym pobieramy w tle
+MENU_PREFETCH_CONCURRENCY = 2
+
+# single-flight w SmartLunchClient._request_json: jak długo (s) współdzielić świeży wynik GET
+REQUEST_RESULT_TTL = 5
+
+# polityka ponowień w SmartLunchClient (RETRY_STATUSES + błędy sieci, tylko metody idempotentne)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BACKOFF_BASE = 1.0   # s, podwajane z każdą próbą (pełny jitter)
+RETRY_BACKOFF_MAX = 30.0   # s, górny limit pojedynczego oczekiwania
+REQUEST_DEADLINE = 90      # s, łączny budżet na wszystkie próby jednego zapytania
+
+# księga dofinansowania (ledger.py): migawki per dzień → dzienne wydatki → statystyki długoterminowe
+LEDGER_STORAGE_VERSION = 1
+LEDGER_SAVE_DELAY = 60            # s, zapisy łączone w jeden
+LEDGER_IMPORT_DELAY = 30          # s, zmiany z tego okna → jeden import statystyk
+LEDGER_IMPORT_BATCH = 100         # wierszy na jedno async_add_external_statistics
+LEDGER_BACKFILL_MONTHS = 1        # nowa instalacja: bieżący miesiąc + tyle poprzednich
+LEDGER_BACKFILL_CONCURRENCY = 3   # równoległe zapytania funding_settings przy backfillu
+
+# dekodowanie odpowiedzi JSON (decoding.py)
+RESPONSE_MAX_BYTES = 8 * 1024 * 1024      # B po dekompresji; większa odpowiedź → błąd zamiast zapchania pamięci
+RESPONSE_CHUNK_SIZE = 64 * 1024           # B, porcja czytania treści
+DECODE_EXECUTOR_THRESHOLD = 256 * 1024    # B, od tylu JSON dekodowany w executorze, nie w pętli zdarzeń
+
+# preflight CSRF przed logowaniem (SmartLunchClient._preflight_csrf)
+CSRF_CHUNK_SIZE = 4096                   # B, strona '/' czytana porcjami do znacznika csrf-token
+CSRF_MAX_BYTES = 256 * 1024              # B, dalej nie szukamy (znacznik jest w <head>)
+
+# ciche odnawianie sesji (tylko gdy użytkownik zgodził się zapamiętać hasło)
+CONF_PASSWORD = "password"
+CONF_STORE_PASSWORD = "store_password"
+# opt-in (OptionsFlow): backfill księgi dofinansowania z funding_settings/{dzień} dla minionych dni –
+# zakłada, że serwer zwraca saldo z TAMTEGO dnia (niepotwierdzone), więc domyślnie wyłączony
+CONF_LEDGER_BACKFILL = "ledger_backfill"
+SESSION_RENEW_MARGIN = timedelta(hours=12)  # odnów tyle przed wygaśnięciem remember_user_token
+
+# ciepły start: snapshot ostatnich dobrych danych entry (homeassistant.helpers.storage)
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # s, zapisy łączone w jeden
+
+# wspólny dla domeny harmonogram zapytań (hass.data[DOMAIN][DATA_SCHEDULER]), limity per host
+DATA_SCHEDULER = "scheduler"
+SCHEDULER_RATE = 2.0          # req/s (token bucket)
+SCHEDULER_BURST = 6           # maks. tokenów naraz
+SCHEDULER_MAX_CONCURRENCY = 4 # zapytań w locie na host
+SCHEDULER_MIN_RATE = 0.2      # req/s – dolna granica po serii 429
+
+# adaptacyjne odpytywanie (polling.py) – interwały z kalendarza dostaw
+POLL_MIN_INTERVAL = timedelta(minutes=2)
+POLL_MAX_INTERVAL = timedelta(hours=2)
+POLL_HOT_DIVISOR = 3               # w oknie dostaw: interwał bazowy / 3
+POLL_ORDER_LEAD = timedelta(hours=3)  # okno zaczyna się tyle przed pierwszą godziną dostawy
+POLL_NON_DELIVERY_FACTOR = 4       # dzień bez dostaw: interwał bazowy × 4
+POLL_NIGHT_START = 22              # h lokalnie
+POLL_NIGHT_END = 6                 # h lokalnie
+POLL_UNCHANGED_AFTER = 3           # po tylu odświeżeniach bez zmian zaczynamy podwajać interwał
+
+# metryki klienta API (metrics.py) – sensory diagnostyczne
+METRICS_LATENCY_SAMPLES = 200              # ostatnie próbki opóźnienia per endpoint (p50/p95)
+METRICS_UPDATE_INTERVAL = timedelta(minutes=1)
+
+# serwis smart_lunch.profile (profiler.py) – ślad na żądanie, wspólny dla domeny
+SERVICE_PROFILE = "profile"
+DATA_PROFILER = "profiler"
+PROFILE_DEFAULT_DURATION = 60     # s
+PROFILE_MAX_DURATION = 600        # s
+PROFILE_MAX_EVENTS = 5000         # ograniczony bufor zdarzeń (najstarsze wypadają)
+PROFILE_TOP_EVENTS = 25
+PROFILE_TOP_ALLOCATIONS = 25
+PROFILE_LAG_PROBE_INTERVAL = 0.1  # s, próbkowanie opóźnienia pętli zdarzeń
@@ -0,0 +1,501 @@
+# custom_components/smart_lunch/coordinator.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_track_point_in_time, async_track_point_in_utc_time
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import SmartLunchClient, decode_remember_token_expiry
+from .cache import DeliveryDatesCache, FundingCache, MenuCache
+from .const import MENU_PREFETCH_DAYS, METRICS_UPDATE_INTERVAL, OPT_SELECTED_DAY, OPT_SELECTED_PLACE_ID
+from .metrics import ApiMetrics
+from .models import DeliveryPlaces
+from .profiler import SmartLunchProfiler, measure
+from .selection import SmartLunchSelection
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_delivery_places(dp: dict[str, Any] | None) -> dict[str, Any]:
+    """delivery_places → model (jedno przejście) → dane potrzebne platformom."""
+    places = DeliveryPlaces.from_api(dp)
+    options = [(p.id, p.name) for p in places.places]
+    return build_places_data(options, places.server_default_id, raw=dp if keep_raw_payloads() else None)
+
+
+def keep_raw_payloads() -> bool:
+    """Surowe payloady API w danych koordynatorów tylko przy włączonym debug logu integracji."""
+    return _LOGGER.isEnabledFor(logging.DEBUG)
+
+
+def build_places_data(
+    options: list[tuple[int, str]], server_default_id: int | None, raw: Any = None
+) -> dict[str, Any]:
+    """Dane koordynatora miejsc z listy (id, nazwa) – wspólne dla parsowania i snapshotu."""
+    id_to_name = {pid: name for pid, name in options}
+
+    # domyślne miejsce: flaga "default" z serwera, a w razie braku pierwsze z listy
+    default_id = server_default_id
+    if default_id is None and options:
+        default_id = options[0][0]
+
+    data = {
+        "options": options,                 # [(id, name), ...]
+        "id_to_name": id_to_name,           # {id: name}
+        "server_default_id": server_default_id,
+        "default_id": default_id,
+        "default_name": id_to_name.get(default_id) if default_id is not None else None,
+    }
+    if raw is not None:
+        data["raw"] = raw
+    return data
+
+
+class SmartLunchCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Baza koordynatorów integracji: opcjonalna polityka interwału (polling.py).
+
+    Przed zaplanowaniem kolejnego odświeżenia interwał jest wyliczany na nowo
+    z polityki; liczymy też, ile odświeżeń z rzędu nie przyniosło zmian.
+    """
+
+    # czy koordynator ma przyspieszać w oknie dostaw (miejsca zmieniają się rzadko)
+    poll_hot = True
+    # liczniki odświeżeń / błędów (sensory diagnostyczne); ustawiane w __init__ integracji
+    metrics: ApiMetrics | None = None
+    profiler: SmartLunchProfiler | None = None
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.base_interval: timedelta | None = self.update_interval
+        self.unchanged_streak = 0
+        self._interval_policy: Callable[[SmartLunchCoordinator], timedelta] | None = None
+
+    @callback
+    def async_set_interval_policy(
+        self, policy: Callable[[SmartLunchCoordinator], timedelta] | None
+    ) -> None:
+        self._interval_policy = policy
+
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        previous = self.data
+        with measure(self.profiler, "refresh", self.name):
+            await super()._async_refresh(*args, **kwargs)
+        if self.metrics is not None:
+            self.metrics.record_refresh(self.name, self.last_update_success)
+        if self.last_update_success:
+            if previous is not None and self.data == previous:
+                self.unchanged_streak += 1
+            else:
+                self.unchanged_streak = 0
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        if self._interval_policy is not None and self.base_interval is not None:
+            self.update_interval = self._interval_policy(self)
+        super()._schedule_refresh()
+
+
+class SmartLunchDeliveryPlacesCoordinator(SmartLunchCoordinator):
+    """Wspólny (per entry) koordynator miejsc dostawy – jeden fetch i jeden parse na cykl."""
+
+    poll_hot = False
+
+    def __init__(self, hass: HomeAssistant, client: SmartLunchClient) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_delivery_places",
+            update_interval=timedelta(minutes=15),
+            # listenery tylko przy faktycznej zmianie danych
+            always_update=False,
+        )
+        self.client = client
+        self._last_payload: Any = None
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        try:
+            dp = await self.client.fetch_delivery_places()
+        except ConfigEntryAuthFailed:
+            raise
+        except Exception as e:
+            raise UpdateFailed(str(e)) from e
+        # ten sam obiekt = 304 / identyczna treść → bez ponownego parsowania
+        if dp is self._last_payload and self.data is not None:
+            return self.data
+        self._last_payload = dp
+        return parse_delivery_places(dp)
+
+
+class SmartLunchFundingCoordinator(SmartLunchCoordinator):
+    """Dofinansowanie na dziś (funding_settings/{day}) z cache per dzień.
+
+    Zmiana doby nie czeka na kolejny interwał: o lokalnej północy timer
+    (async_track_point_in_time) przełącza dzień i od razu odświeża dane.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, client: SmartLunchClient, funding_cache: FundingCache
+    ) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_funding",
+            update_interval=timedelta(minutes=30),
+            always_update=False,  # niezmieniony payload (304) → bez zapisu stanu
+        )
+        self.entry = entry
+        self.client = client
+        self.funding_cache = funding_cache
+        # dni, dla których trzymamy dofinansowanie z wyprzedzeniem (daty dostaw)
+        self.lookahead_days: Callable[[], Iterable[str]] | None = None
+        self._unsub_midnight: Callable[[], None] | None = None
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        today = dt_util.now().date().isoformat()
+        try:
+            funding = await self.funding_cache.async_get(today)
+        except ConfigEntryAuthFailed:
+            raise
+        except Exception as e:
+            raise UpdateFailed(str(e)) from e
+        self.async_prefetch_lookahead()
+        data = {
+            "daily_cents": funding.daily_cents,
+            "monthly_cents": funding.monthly_cents,
+            "source_day": today,
+        }
+        if keep_raw_payloads():
+            data["raw"] = self.funding_cache.payload(today)
+        return data
+
+    @callback
+    def async_prefetch_lookahead(self) -> None:
+        """Odśwież w tle przeterminowane dni dostaw (TTL per dzień); zadanie entry – anulowane przy unload."""
+        if self.lookahead_days is None:
+            return
+        days = list(self.lookahead_days())
+        if days:
+            self.entry.async_create_background_task(
+                self.hass, self.funding_cache.async_prefetch(days), "smart_lunch_funding_prefetch"
+            )
+
+    @callback
+    def async_schedule_rollover(self) -> Callable[[], None]:
+        """Zaplanuj przełączenie dnia na najbliższą lokalną północ; zwraca funkcję anulującą."""
+        next_midnight = dt_util.start_of_local_day(dt_util.now() + timedelta(days=1))
+        self._unsub_midnight = async_track_point_in_time(self.hass, self._on_midnight, next_midnight)
+        return self._cancel_rollover
+
+    @callback
+    def _cancel_rollover(self) -> None:
+        if self._unsub_midnight:
+            self._unsub_midnight()
+            self._unsub_midnight = None
+
+    @callback
+    def _on_midnight(self, now: datetime) -> None:
+        self.funding_cache.prune(before=dt_util.as_local(now).date().isoformat())
+        self.entry.async_create_background_task(
+            self.hass, self.async_refresh(), "smart_lunch_funding_rollover"
+        )
+        self.async_schedule_rollover()
+
+
+class SmartLunchTokenCoordinator(SmartLunchCoordinator):
+    """Wygaśnięcie remember_user_token – zdarzeniowo, bez odpytywania.
+
+    Nowa wartość przychodzi od klienta przy każdej zmianie ciastek (login,
+    odnowienie, attach_cookies); przejście w stan „wygasł” robi timer na expiry.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: SmartLunchClient) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_token_expiry",
+            update_interval=None,
+            always_update=False,
+        )
+        self.client = client
+        self._unsub_expiry: Callable[[], None] | None = None
+        self._unsub_cookies: Callable[[], None] | None = None
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        return self._expiry_data(self.client.remember_token())
+
+    def _expiry_data(self, token: str | None) -> dict[str, Any]:
+        try:
+            exp: datetime | None = decode_remember_token_expiry(token) if token else None
+        except Exception as e:
+            _LOGGER.debug("Token expiry update failed: %s", e)
+            exp = None
+        self._schedule_expiry(exp)
+        return {"expiry": exp, "expired": exp is not None and exp <= dt_util.utcnow()}
+
+    @callback
+    def _schedule_expiry(self, exp: datetime | None) -> None:
+        if self._unsub_expiry:
+            self._unsub_expiry()
+            self._unsub_expiry = None
+        if exp is not None and exp > dt_util.utcnow():
+            self._unsub_expiry = async_track_point_in_utc_time(self.hass, self._on_expired, exp)
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Podepnij się pod zmiany ciastek klienta; zwraca funkcję odpinającą (i timer)."""
+        self._unsub_cookies = self.client.async_add_cookie_listener(self._on_cookies_changed)
+        return self._async_stop
+
+    @callback
+    def _async_stop(self) -> None:
+        if self._unsub_cookies:
+            self._unsub_cookies()
+            self._unsub_cookies = None
+        self._schedule_expiry(None)
+
+    @callback
+    def _on_cookies_changed(self, token: str | None) -> None:
+        self.async_set_updated_data(self._expiry_data(token))
+
+    @callback
+    def _on_expired(self, _now: datetime) -> None:
+        self._unsub_expiry = None
+        self.async_set_updated_data({**(self.data or {}), "expired": True})
+
+
+class SmartLunchMetricsCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Migawka metryk klienta API dla sensorów diagnostycznych – bez zapytań do serwera.
+
+    Metryki rosną przy każdym zapytaniu; sensory odczytują je raz na
+    METRICS_UPDATE_INTERVAL, żeby nie zapisywać stanu po każdym żądaniu.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: ApiMetrics) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_metrics",
+            update_interval=METRICS_UPDATE_INTERVAL,
+            always_update=False,
+        )
+        self.metrics = metrics
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        return self.metrics.as_dict()
+
+
+def _current_place_id(selection: SmartLunchSelection, places: DataUpdateCoordinator) -> int | None:
+    """Aktualne miejsce – lokalny wybór albo fallback do serwerowego."""
+    place_id = selection.place_id
+    if place_id is None:
+        place_id = (places.data or {}).get("server_default_id")
+    return int(place_id) if place_id is not None else None
+
+
+class SmartLunchDeliveryDaysCoordinator(SmartLunchCoordinator):
+    """Dostępne daty dostawy dla wybranego miejsca (z cache dat, po TTL z serwera)."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        selection: SmartLunchSelection,
+        places: SmartLunchDeliveryPlacesCoordinator,
+        dates_cache: DeliveryDatesCache,
+    ) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_delivery_day_select",
+            update_interval=timedelta(minutes=15),
+            always_update=False,
+        )
+        self.selection = selection
+        self.places = places
+        self.dates_cache = dates_cache
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        try:
+            place_id = _current_place_id(self.selection, self.places)
+            if place_id is None:
+                # brak miejsca → brak dat
+                return {"place_id": None, "dates": []}
+
+            # Daty z cache (place_id → DeliveryDates); fetch tylko po TTL
+            delivery_dates = await self.dates_cache.async_get(place_id)
+        except ConfigEntryAuthFailed:
+            raise
+        except Exception as e:
+            raise UpdateFailed(str(e)) from e
+
+        dates = delivery_dates.days
+        # Obecny lokalny wybór dnia – tylko jeśli nadal dostępny
+        selected_day = self.selection.day
+        if selected_day not in dates:
+            selected_day = None
+        return {
+            "place_id": place_id,
+            "dates": dates,           # list[str] YYYY-MM-DD
+            "selected_day": selected_day,
+        }
+
+
+class SmartLunchDeliveryHoursCoordinator(SmartLunchCoordinator):
+    """Godziny dla wybranego miejsca i dnia – z cache dat, bez dodatkowego zapytania."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        selection: SmartLunchSelection,
+        places: SmartLunchDeliveryPlacesCoordinator,
+        dates_cache: DeliveryDatesCache,
+    ) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_delivery_hour_select",
+            update_interval=None,  # odświeżany razem z koordynatorem dni (wspólny cache dat)
+            always_update=False,
+        )
+        self.selection = selection
+        self.places = places
+        self.dates_cache = dates_cache
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        try:
+            place_id = _current_place_id(self.selection, self.places)
+            if place_id is None:
+                return {"place_id": None, "day": None, "hours": []}
+
+            # Dzień – musi być wybrany, inaczej nie mamy jak wyliczyć godzin
+            current_day = self.selection.day
+            if not current_day:
+                return {"place_id": place_id, "day": None, "hours": []}
+
+            delivery_dates = await self.dates_cache.async_get(place_id, allow_stale=True)
+        except ConfigEntryAuthFailed:
+            raise
+        except Exception as e:
+            raise UpdateFailed(str(e)) from e
+
+        hours: list[str] = list(delivery_dates.hours_for(current_day))
+        # Obecny lokalny wybór godziny – tylko jeśli nadal dostępna
+        selected_hour = self.selection.hour
+        if selected_hour not in hours:
+            selected_hour = None
+        return {
+            "place_id": place_id,
+            "day": current_day,
+            "hours": hours,                 # list[str] "HH:MM"
+            "selected_hour": selected_hour,
+        }
+
+
+class SmartLunchMenuCoordinator(SmartLunchCoordinator):
+    """Menu dla wybranego miejsca i dnia (z cache menu) + prefetch kolejnych dni dostaw w tle."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        selection: SmartLunchSelection,
+        places: SmartLunchDeliveryPlacesCoordinator,
+        dates_cache: DeliveryDatesCache,
+        menu_cache: MenuCache,
+    ) -> None:
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name="smart_lunch_menu",
+            update_interval=timedelta(minutes=30),
+            always_update=False,  # menu bez zmian (304) → bez zapisu stanu
+        )
+        self.entry = entry
+        self.selection = selection
+        self.places = places
+        self.dates_cache = dates_cache
+        self.menu_cache = menu_cache
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        self.menu_cache.prune(before=dt_util.now().date().isoformat())
+        try:
+            place_id = _current_place_id(self.selection, self.places)
+            day = self.selection.day
+            if place_id is None or not day:
+                return {"place_id": place_id, "day": None, "menu": None}
+            menu = await self.menu_cache.async_get(place_id, day)
+        except ConfigEntryAuthFailed:
+            raise
+        except Exception as e:
+            raise UpdateFailed(str(e)) from e
+
+        # kolejne dni dostaw po wybranym – przełączenie dnia trafi już w cache
+        dates = self.dates_cache.peek(place_id)
+        days = dates.days if dates else []
+        upcoming = [d for d in days if d > day][:MENU_PREFETCH_DAYS]
+        if upcoming:
+            # zadanie entry – anulowane przy unload (sesja klienta jest wtedy zamykana)
+            self.entry.async_create_background_task(
+                self.hass, self.menu_cache.async_prefetch(place_id, upcoming), "smart_lunch_menu_prefetch"
+            )
+        return {"place_id": place_id, "day": day, "menu": menu}
+
+
+# Graf startu: węzeł → węzły, których dane są mu potrzebne przed pierwszym odświeżeniem
+STARTUP_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    "places_coordinator": (),
+    "funding_coordinator": (),
+    "token_coordinator": (),
+    "day_coordinator": ("places_coordinator",),
+    "hour_coordinator": ("day_coordinator",),
+    # menu_coordinator celowo poza startem: błąd menu nie może blokować setupu entry –
+    # pierwsze odświeżenie robi planer kaskady po aktualizacji dni (CASCADE_DEPENDENCIES)
+}
+
+# Graf kaskady selectów: źródło zmiany (pole wyboru / koordynator) → węzły do przeliczenia.
+# Zmiana miejsca wymienia całą kaskadę wprost – jeden plan zamiast drugiego od krawędzi day_coordinator.
+CASCADE_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    OPT_SELECTED_PLACE_ID: ("day_coordinator", "hour_coordinator", "menu_coordinator"),
+    OPT_SELECTED_DAY: ("hour_coordinator", "menu_coordinator"),
+    "day_coordinator": ("hour_coordinator", "menu_coordinator"),
+}
+
+
+async def async_refresh_all(
+    coordinators: dict[str, DataUpdateCoordinator], *, first_refresh: bool = True
+) -> None:
+    """Odświeżenie wszystkich koordynatorów wg STARTUP_DEPENDENCIES.
+
+    Niezależne węzły startują równolegle; zależny węzeł rusza, gdy tylko
+    skończą się jego wejścia (a nie po wszystkich poprzednich krokach).
+    first_refresh=False → zwykłe async_refresh (np. w tle po ciepłym starcie ze snapshotu).
+    """
+    tasks: dict[str, asyncio.Future] = {}
+
+    async def _run(name: str) -> None:
+        deps = [tasks[d] for d in STARTUP_DEPENDENCIES.get(name, ()) if d in tasks]
+        if deps:
+            await asyncio.gather(*deps)
+        coordinator = coordinators[name]
+        if first_refresh:
+            await coordinator.async_config_entry_first_refresh()
+        else:
+            await coordinator.async_refresh()
+
+    # węzły w kolejności topologicznej (zależności zawsze przed zależnymi)
+    for name in STARTUP_DEPENDENCIES:
+        if name in coordinators:
+            tasks[name] = asyncio.ensure_future(_run(name))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
@@ -0,0 +1,52 @@
+# custom_components/smart_lunch/decoding.py
+from __future__ import annotations
+
+import asyncio
+import time
+from importlib.util import find_spec
+from typing import Any
+
+from aiohttp import ClientResponse
+from homeassistant.core import HomeAssistant
+from homeassistant.util.json import json_loads
+
+from .const import DECODE_EXECUTOR_THRESHOLD, RESPONSE_CHUNK_SIZE, RESPONSE_MAX_BYTES
+
+# aiohttp rozpakowuje br tylko z zainstalowanym Brotli / brotlicffi – inaczej nie prosimy o br
+BROTLI_AVAILABLE = find_spec("brotli") is not None or find_spec("brotlicffi") is not None
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+
+class ResponseTooLargeError(ValueError):
+    """Treść odpowiedzi przekracza RESPONSE_MAX_BYTES (po dekompresji)."""
+
+
+async def read_body(response: ClientResponse, limit: int = RESPONSE_MAX_BYTES) -> bytes:
+    """Czytaj treść porcjami (aiohttp już rozpakowuje gzip/br), przerwij po przekroczeniu limitu."""
+    if response.content_length is not None and response.content_length > limit:
+        raise ResponseTooLargeError(f"Response too large: {response.content_length} B > {limit} B")
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+        body += chunk
+        if len(body) > limit:
+            raise ResponseTooLargeError(f"Response too large: > {limit} B")
+    return bytes(body)
+
+
+def _timed_loads(body: bytes) -> tuple[Any, float]:
+    started = time.perf_counter()
+    data = json_loads(body)
+    return data, time.perf_counter() - started
+
+
+async def decode_json(hass: HomeAssistant | None, body: bytes) -> tuple[Any, float, bool]:
+    """json_loads (orjson w HA); duże treści w executorze. Zwraca (dane, czas dekodowania, off_loop)."""
+    if len(body) < DECODE_EXECUTOR_THRESHOLD:
+        data, elapsed = _timed_loads(body)
+        return data, elapsed, False
+    if hass is not None:
+        data, elapsed = await hass.async_add_executor_job(_timed_loads, body)
+    else:
+        data, elapsed = await asyncio.get_running_loop().run_in_executor(None, _timed_loads, body)
+    return data, elapsed, True
+
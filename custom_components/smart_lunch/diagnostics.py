@@ -0,0 +1,61 @@
+# custom_components/smart_lunch/diagnostics.py
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PASSWORD, DOMAIN
+
+TO_REDACT = {"cookies", CONF_PASSWORD, "email"}
+
+COORDINATOR_KEYS = (
+    "places_coordinator",
+    "funding_coordinator",
+    "token_coordinator",
+    "day_coordinator",
+    "hour_coordinator",
+)
+
+
+def _menu_diagnostics(data: dict[str, Any]) -> dict[str, Any] | None:
+    coordinator = data.get("menu_coordinator")
+    if coordinator is None:
+        return None
+    current = coordinator.data or {}
+    menu = current.get("menu")
+    return {
+        "last_update_success": coordinator.last_update_success,
+        "place_id": current.get("place_id"),
+        "day": current.get("day"),
+        "items": menu.as_list() if menu else [],
+        "cached_menus": len(data["menu_cache"]) if "menu_cache" in data else 0,
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Dane koordynatorów (surowe payloady tylko przy włączonym debug logu integracji)."""
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id) or {}
+    coordinators: dict[str, Any] = {}
+    for key in COORDINATOR_KEYS:
+        coordinator = data.get(key)
+        if coordinator is None:
+            continue
+        coordinators[key] = {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "data": coordinator.data,
+        }
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "selection": data["selection"].as_dict() if data.get("selection") else None,
+        "api_metrics": data["client"].metrics.as_dict() if data.get("client") else None,
+        "coordinators": coordinators,
+        "menu": _menu_diagnostics(data),
+        "ledger": data["ledger"].as_dict() if data.get("ledger") else None,
+    }
@@ -0,0 +1,86 @@
+# custom_components/smart_lunch/entity.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DATA_PROFILER, DOMAIN
+from .profiler import measure
+
+_NO_VIEW: Any = object()
+
+
+@dataclass(frozen=True, slots=True)
+class OptionsView:
+    """Opcje selecta + indeksy do sprawdzania/mapowania w O(1) (etykieta → id i id → etykieta)."""
+
+    options: list[str]
+    index: frozenset[str]
+    ids: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    labels: Mapping[Any, str] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, options: Iterable[str], ids: Mapping[str, Any] | None = None) -> OptionsView:
+        opts = list(options)
+        ids = dict(ids or {})
+        return cls(
+            opts,
+            frozenset(opts),
+            MappingProxyType(ids),
+            MappingProxyType({value: label for label, value in ids.items()}),
+        )
+
+
+class SmartLunchCoordinatorEntity(CoordinatorEntity):
+    """CoordinatorEntity, który zapisuje stan tylko przy faktycznej zmianie.
+
+    Przed async_write_ha_state porównujemy dostępność, stan i atrybuty z ostatnio
+    zapisanymi – identyczny wynik nie trafia do state machine ani recordera.
+    """
+
+    _last_state_key: Any = None
+    _view_source: Any = _NO_VIEW
+    _view: Any = None
+
+    def _build_view(self, data: dict[str, Any]) -> Any:
+        """Widok encji (opcje, indeksy, sformatowane wartości) – nadpisywany w platformach."""
+        return None
+
+    @property
+    def view(self) -> Any:
+        """Widok liczony raz na obiekt danych koordynatora; kolejne odczyty zwracają gotowy."""
+        data = self.coordinator.data
+        if data is not self._view_source:
+            self._view = self._build_view(data or {})
+            self._view_source = data
+        return self._view
+
+    def _state_key(self) -> tuple:
+        return (
+            self.available,
+            self.state,
+            self.capability_attributes,
+            self.extra_state_attributes,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # HA zapisuje stan zaraz po dodaniu encji – pierwsza aktualizacja koordynatora go nie powtarza
+        self._last_state_key = self._state_key()
+
+    @callback
+    def async_write_if_changed(self) -> None:
+        key = self._state_key()
+        if key == self._last_state_key:
+            return
+        self._last_state_key = key
+        with measure(self.hass.data.get(DOMAIN, {}).get(DATA_PROFILER), "state_write", self.entity_id):
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.async_write_if_changed()
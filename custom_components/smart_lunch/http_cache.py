@@ -0,0 +1,70 @@
+# custom_components/smart_lunch/http_cache.py
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+def body_digest(body: bytes) -> bytes:
+    """Skrót treści odpowiedzi – fallback, gdy serwer nie wysyła ETag/Last-Modified."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+@dataclass
+class CachedResponse:
+    data: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    digest: Optional[bytes] = None
+
+
+class ResponseCache:
+    """Per-entry cache odpowiedzi GET z walidatorami (ETag / Last-Modified / skrót treści).
+
+    Niezmieniona odpowiedź (304 albo ten sam skrót treści) zwraca TEN SAM obiekt
+    co poprzednio – koordynatory rozpoznają to po `is` i pomijają parsowanie.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, CachedResponse] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        return self._entries.get(key)
+
+    def conditional_headers(self, key: tuple) -> dict[str, str]:
+        """Nagłówki If-None-Match / If-Modified-Since dla znanego zasobu."""
+        cached = self._entries.get(key)
+        if cached is None:
+            return {}
+        headers: dict[str, str] = {}
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def not_modified(self, key: tuple, etag: str | None, last_modified: str | None) -> Any:
+        """Serwer odpowiedział 304 – odśwież walidatory i zwróć zapamiętany obiekt."""
+        cached = self._entries[key]
+        cached.etag = etag or cached.etag
+        cached.last_modified = last_modified or cached.last_modified
+        return cached.data
+
+    def lookup_body(self, key: tuple, digest: bytes, etag: str | None, last_modified: str | None) -> tuple[bool, Any]:
+        """Treść identyczna jak poprzednio? → (True, zapamiętany obiekt) bez parsowania."""
+        cached = self._entries.get(key)
+        if cached is None or cached.digest != digest:
+            return False, None
+        cached.etag = etag
+        cached.last_modified = last_modified
+        return True, cached.data
+
+    def store(self, key: tuple, data: Any, digest: bytes, etag: str | None, last_modified: str | None) -> None:
+        self._entries[key] = CachedResponse(data, etag, last_modified, digest)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,252 @@
+# custom_components/smart_lunch/ledger.py
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import SmartLunchClient
+from .const import (
+    DOMAIN,
+    LEDGER_BACKFILL_CONCURRENCY,
+    LEDGER_BACKFILL_MONTHS,
+    LEDGER_IMPORT_BATCH,
+    LEDGER_IMPORT_DELAY,
+    LEDGER_SAVE_DELAY,
+    LEDGER_STORAGE_VERSION,
+)
+from .models import Funding
+
+_LOGGER = logging.getLogger(__name__)
+
+# HA ≥ 2025.x: mean_type / unit_class zamiast has_mean; starsze wersje (min. z hacs.json) ich nie znają
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # starsze HA
+    StatisticMeanType = None
+_META_FIELDS = getattr(StatisticMetaData, "__annotations__", {})
+
+
+def _spend_metadata(statistic_id: str) -> StatisticMetaData:
+    metadata: dict[str, Any] = {
+        "has_sum": True,
+        "name": "Smart Lunch – wydatki z dofinansowania",
+        "source": DOMAIN,
+        "statistic_id": statistic_id,
+        "unit_of_measurement": "PLN",
+    }
+    if "mean_type" in _META_FIELDS and StatisticMeanType is not None:
+        metadata["mean_type"] = StatisticMeanType.NONE
+    else:
+        metadata["has_mean"] = False
+    if "unit_class" in _META_FIELDS:
+        metadata["unit_class"] = None
+    return StatisticMetaData(**metadata)
+
+
+def spend_statistic_id(entry_id: str) -> str:
+    """Id statystyki zewnętrznej (format "domena:obiekt", małe litery)."""
+    return f"{DOMAIN}:funding_spend_{entry_id.lower()}"
+
+
+class SmartLunchFundingLedger:
+    """Księga dofinansowania entry: migawka per dzień + dzienny wydatek, we własnym Store.
+
+    Wydatek dnia = spadek monthly_cents względem poprzedniej migawki z tego samego
+    miesiąca (pierwszy dzień miesiąca w księdze nie ma punktu odniesienia → 0).
+    Nowa migawka przelicza tylko swój dzień i następny zapisany dzień, a do
+    statystyk długoterminowych idą partiami tylko dni od najwcześniejszej zmiany.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, client: SmartLunchClient | None = None) -> None:
+        self.hass = hass
+        self.client = client
+        self.statistic_id = spend_statistic_id(entry_id)
+        self._store: Store[dict[str, Any]] = Store(
+            hass, LEDGER_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.ledger"
+        )
+        # "YYYY-MM-DD" → {daily_cents, monthly_cents, spend_cents, sum_cents}
+        self._days: dict[str, dict[str, Any]] = {}
+        self._order: list[str] = []  # dni posortowane rosnąco
+        self._dirty_from: str | None = None  # najwcześniejszy dzień do ponownego importu
+        self._backfilled = False
+        self._backfilling = False  # backfill w toku – drugi start byłby duplikatem zapytań
+        self._unsub_import: CALLBACK_TYPE | None = None
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    async def async_load(self) -> None:
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.debug("Nie udało się wczytać księgi dofinansowania: %s", e)
+            stored = None
+        stored = stored or {}
+        self._days = {d: dict(v) for d, v in (stored.get("days") or {}).items() if isinstance(v, dict)}
+        self._order = sorted(self._days)
+        self._dirty_from = stored.get("dirty_from")
+        self._backfilled = bool(stored.get("backfilled"))
+
+    @property
+    def needs_backfill(self) -> bool:
+        return not self._backfilled and not self._backfilling
+
+    @callback
+    def async_record(self, day: str, funding: Funding) -> None:
+        """Dopisz / nadpisz migawkę dnia; przelicza wydatek tego dnia i następnego."""
+        if funding.monthly_cents is None:
+            return
+        current = self._days.get(day)
+        if (
+            current is not None
+            and current.get("monthly_cents") == funding.monthly_cents
+            and current.get("daily_cents") == funding.daily_cents
+        ):
+            return
+        if current is None:
+            bisect.insort(self._order, day)
+        self._days[day] = {"daily_cents": funding.daily_cents, "monthly_cents": funding.monthly_cents}
+        i = bisect.bisect_left(self._order, day)
+        self._update_spend(i)
+        if i + 1 < len(self._order):
+            self._update_spend(i + 1)
+        if self._dirty_from is None or day < self._dirty_from:
+            self._dirty_from = day
+        self._store.async_delay_save(self._data_to_save, LEDGER_SAVE_DELAY)
+        self._schedule_import()
+
+    def _update_spend(self, i: int) -> None:
+        day = self._order[i]
+        entry = self._days[day]
+        prev_day = self._order[i - 1] if i > 0 else None
+        spend = 0
+        if prev_day is not None and prev_day[:7] == day[:7]:
+            # doładowanie w trakcie miesiąca (wzrost salda) to nie wydatek
+            spend = max(0, self._days[prev_day]["monthly_cents"] - entry["monthly_cents"])
+        entry["spend_cents"] = spend
+
+    def month_spend_cents(self, month: str) -> int:
+        """Suma wydatków w miesiącu ("YYYY-MM")."""
+        return sum(e.get("spend_cents") or 0 for d, e in self._days.items() if d[:7] == month)
+
+    @callback
+    def _schedule_import(self) -> None:
+        if self._unsub_import is not None:
+            self._unsub_import()
+        self._unsub_import = async_call_later(self.hass, LEDGER_IMPORT_DELAY, self._async_import_later)
+
+    @callback
+    def _async_import_later(self, _now: datetime) -> None:
+        self._unsub_import = None
+        self.async_import()
+
+    @callback
+    def async_import(self) -> int:
+        """Wyślij do statystyk dni od najwcześniejszej zmiany (partiami); zwraca liczbę wierszy."""
+        if self._unsub_import is not None:
+            self._unsub_import()
+            self._unsub_import = None
+        if self._dirty_from is None or "recorder" not in self.hass.config.components:
+            return 0
+
+        start = bisect.bisect_left(self._order, self._dirty_from)
+        # dni przed _dirty_from zostały już zaimportowane z aktualną sumą narastającą
+        total = self._days[self._order[start - 1]].get("sum_cents") if start > 0 else 0
+        if total is None:
+            total = sum(self._days[d].get("spend_cents") or 0 for d in self._order[:start])
+        rows: list[StatisticData] = []
+        for day in self._order[start:]:
+            entry = self._days[day]
+            total += entry.get("spend_cents") or 0
+            entry["sum_cents"] = total
+            rows.append(
+                StatisticData(
+                    start=dt_util.start_of_local_day(date.fromisoformat(day)),
+                    state=(entry.get("spend_cents") or 0) / 100,
+                    sum=total / 100,
+                )
+            )
+        metadata = _spend_metadata(self.statistic_id)
+        for i in range(0, len(rows), LEDGER_IMPORT_BATCH):
+            async_add_external_statistics(self.hass, metadata, rows[i : i + LEDGER_IMPORT_BATCH])
+        _LOGGER.debug("Księga dofinansowania: import %s dni od %s", len(rows), self._dirty_from)
+        self._dirty_from = None
+        self._store.async_delay_save(self._data_to_save, LEDGER_SAVE_DELAY)
+        return len(rows)
+
+    async def async_backfill(self) -> None:
+        """Migawki minionych dni (bieżący + LEDGER_BACKFILL_MONTHS poprzednich miesięcy).
+
+        Tylko na opt-in (CONF_LEDGER_BACKFILL): zakłada, że funding_settings/{dzień} dla
+        przeszłego dnia zwraca saldo z tamtego dnia, a nie bieżące.
+        """
+        if not self.needs_backfill or self.client is None:
+            return
+        self._backfilling = True
+        try:
+            await self._async_backfill_days()
+        finally:
+            self._backfilling = False
+
+    async def _async_backfill_days(self) -> None:
+        today = dt_util.now().date()
+        first = today.replace(day=1)
+        for _ in range(LEDGER_BACKFILL_MONTHS):
+            first = (first - timedelta(days=1)).replace(day=1)
+        days = [
+            d for n in range((today - first).days)
+            if (d := (first + timedelta(days=n)).isoformat()) not in self._days
+        ]
+        sem = asyncio.Semaphore(LEDGER_BACKFILL_CONCURRENCY)
+
+        async def _one(day: str) -> tuple[str, Funding] | None:
+            async with sem:
+                try:
+                    return day, Funding.from_api(await self.client.fetch_funding_for_day(day))
+                except Exception as e:
+                    _LOGGER.debug("Backfill dofinansowania dla %s nieudany: %s", day, e)
+                    return None
+
+        for result in await asyncio.gather(*(_one(d) for d in days)):
+            if result is not None:
+                self.async_record(*result)
+        self._backfilled = True
+        self._store.async_delay_save(self._data_to_save, LEDGER_SAVE_DELAY)
+        self.async_import()
+
+    @callback
+    def async_stop(self) -> None:
+        """Unload: nie czekaj na timer – zaległe dni od razu do statystyk."""
+        self.async_import()
+
+    def as_dict(self) -> dict[str, Any]:
+        month = dt_util.now().date().isoformat()[:7]
+        return {
+            "statistic_id": self.statistic_id,
+            "days": len(self._days),
+            "first_day": self._order[0] if self._order else None,
+            "backfilled": self._backfilled,
+            "pending_import_from": self._dirty_from,
+            "month_spend_cents": self.month_spend_cents(month),
+        }
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"days": self._days, "dirty_from": self._dirty_from, "backfilled": self._backfilled}
+
+    async def async_remove(self) -> None:
+        """Usuń księgę i jej statystyki (usunięcie entry)."""
+        await self._store.async_remove()
+        if "recorder" in self.hass.config.components:
+            get_instance(self.hass).async_clear_statistics([self.statistic_id])
@@ -0,0 +1,141 @@
+# custom_components/smart_lunch/metrics.py
+from __future__ import annotations
+
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from .const import METRICS_LATENCY_SAMPLES
+
+_VOLATILE_SEGMENT = re.compile(r"^(\d+|\d{4}-\d{2}-\d{2})$")
+
+
+@lru_cache(maxsize=64)
+def endpoint_name(path: str) -> str:
+    """Ścieżka → nazwa endpointu do metryk: ostatni stały segment (bez dat/ID i query)."""
+    segments = [s for s in path.split("?", 1)[0].split("/") if s and not _VOLATILE_SEGMENT.match(s)]
+    return segments[-1] if segments else "home"
+
+
+def _percentile(ordered: list[float], q: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+@dataclass(slots=True)
+class RequestObservation:
+    """Wynik jednego zapytania wypełniany w trakcie (SmartLunchClient._observe)."""
+
+    status: int | None = None
+    nbytes: int = 0
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0                      # statusy ≥ 400 i błędy sieci
+    bytes_received: int = 0
+    retries: int = 0
+    decodes: int = 0
+    decodes_off_loop: int = 0            # dekodowane w executorze (duże treści)
+    decode_time: float = 0.0             # s, łącznie
+    statuses: Counter = field(default_factory=Counter)
+    cache_hits: Counter = field(default_factory=Counter)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=METRICS_LATENCY_SAMPLES))
+
+    def as_dict(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+        p50 = _percentile(ordered, 0.5)
+        p95 = _percentile(ordered, 0.95)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "retries": self.retries,
+            "decodes": self.decodes,
+            "decodes_off_loop": self.decodes_off_loop,
+            "decode_ms_total": round(self.decode_time * 1000, 1),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            "cache_hits": dict(self.cache_hits),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class ApiMetrics:
+    """Liczniki klienta API per endpoint (od startu entry, tylko w pamięci).
+
+    Opóźnienia trzymamy jako ostatnie METRICS_LATENCY_SAMPLES próbek na endpoint –
+    p50/p95 liczone dopiero przy odczycie (as_dict), nie przy każdym zapytaniu.
+    """
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.refresh_failures: Counter[str] = Counter()
+        self.refreshes: Counter[str] = Counter()
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_request(self, endpoint: str, status: int | None, latency: float, nbytes: int = 0) -> None:
+        """status=None → błąd sieci / timeout (bez odpowiedzi)."""
+        stats = self._stats(endpoint)
+        stats.requests += 1
+        stats.latencies.append(latency)
+        stats.bytes_received += nbytes
+        stats.statuses["error" if status is None else status] += 1
+        if status is None or status >= 400:
+            stats.errors += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        self._stats(endpoint).retries += 1
+
+    def record_cache_hit(self, endpoint: str, kind: str) -> None:
+        """kind: recent (wynik single-flight), coalesced (zapytanie w locie), 304, unchanged (ten sam skrót)."""
+        self._stats(endpoint).cache_hits[kind] += 1
+
+    def record_decode(self, endpoint: str, elapsed: float, off_loop: bool) -> None:
+        stats = self._stats(endpoint)
+        stats.decodes += 1
+        stats.decode_time += elapsed
+        if off_loop:
+            stats.decodes_off_loop += 1
+
+    def record_refresh(self, coordinator: str, success: bool) -> None:
+        self.refreshes[coordinator] += 1
+        if not success:
+            self.refresh_failures[coordinator] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        endpoints = {name: stats.as_dict() for name, stats in sorted(self.endpoints.items())}
+        all_latencies = sorted(l for stats in self.endpoints.values() for l in stats.latencies)
+        p50 = _percentile(all_latencies, 0.5)
+        p95 = _percentile(all_latencies, 0.95)
+        statuses: Counter = Counter()
+        cache_hits: Counter = Counter()
+        for stats in self.endpoints.values():
+            statuses.update({str(k): v for k, v in stats.statuses.items()})
+            cache_hits.update(stats.cache_hits)
+        return {
+            "requests": sum(s.requests for s in self.endpoints.values()),
+            "errors": sum(s.errors for s in self.endpoints.values()),
+            "retries": sum(s.retries for s in self.endpoints.values()),
+            "bytes_received": sum(s.bytes_received for s in self.endpoints.values()),
+            "decode_ms_total": round(sum(s.decode_time for s in self.endpoints.values()) * 1000, 1),
+            "decodes_off_loop": sum(s.decodes_off_loop for s in self.endpoints.values()),
+            "cache_hits": sum(cache_hits.values()),
+            "cache_hits_by_kind": dict(cache_hits),
+            "statuses": dict(sorted(statuses.items())),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "refreshes": dict(self.refreshes),
+            "refresh_failures": sum(self.refresh_failures.values()),
+            "refresh_failures_by_coordinator": dict(self.refresh_failures),
+            "endpoints": endpoints,
+        }
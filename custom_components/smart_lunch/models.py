@@ -0,0 +1,217 @@
+# custom_components/smart_lunch/models.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _as_dict(value: Any) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def _as_int(value: Any) -> int | None:
+    if type(value) is int:
+        return value
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryPlace:
+    id: int
+    name: str
+    default: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryPlaces:
+    """Sparsowana odpowiedź delivery_places (spłaszczone companies_delivery_places)."""
+
+    places: tuple[DeliveryPlace, ...] = ()
+
+    @classmethod
+    def from_api(cls, payload: Any) -> DeliveryPlaces:
+        places: list[DeliveryPlace] = []
+        for comp in _as_list(_as_dict(payload).get("companies_delivery_places")):
+            for loc in _as_list(_as_dict(comp).get("delivery_places")):
+                if not isinstance(loc, dict) or (pid := _as_int(loc.get("id"))) is None:
+                    continue
+                name = loc.get("name_pl") or loc.get("name") or f"Place {pid}"
+                places.append(DeliveryPlace(pid, str(name), loc.get("default") is True))
+        return cls(tuple(places))
+
+    @property
+    def server_default_id(self) -> int | None:
+        """Miejsce oznaczone przez serwer jako domyślne (flaga "default")."""
+        for place in self.places:
+            if place.default:
+                return place.id
+        return None
+
+    @property
+    def default_id(self) -> int | None:
+        """Domyślne miejsce z fallbackiem do pierwszego z listy."""
+        default_id = self.server_default_id
+        if default_id is None and self.places:
+            return self.places[0].id
+        return default_id
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryDate:
+    date: str
+    hours: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryDates:
+    """Sparsowana odpowiedź delivery_dates jako jeden niemutowalny indeks date → hours.
+
+    Dni z tym samym zestawem godzin dzielą jedną krotkę (zwykle wszystkie dni mają
+    te same okna dostaw), więc model w cache zajmuje mniej niż dict z listami.
+    """
+
+    hours_by_day: Mapping[str, tuple[str, ...]] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[str, tuple[str, ...]]]) -> DeliveryDates:
+        shared: dict[tuple[str, ...], tuple[str, ...]] = {}
+        return cls(MappingProxyType({day: shared.setdefault(hours, hours) for day, hours in pairs}))
+
+    @classmethod
+    def from_api(cls, payload: Any) -> DeliveryDates:
+        return cls.from_pairs(
+            (str(d), tuple(h for h in _as_list(item.get("hours")) if isinstance(h, str)))
+            for item in _as_list(_as_dict(payload).get("delivery_dates"))
+            if isinstance(item, dict) and (d := item.get("date"))
+        )
+
+    @classmethod
+    def from_mapping(cls, by_day: Mapping[str, Any]) -> DeliveryDates:
+        """Odtworzenie z {date: [hours]} (np. ze snapshotu)."""
+        return cls.from_pairs(
+            (str(d), tuple(h for h in _as_list(hours) if isinstance(h, str))) for d, hours in by_day.items()
+        )
+
+    @property
+    def dates(self) -> tuple[DeliveryDate, ...]:
+        return tuple(DeliveryDate(d, hours) for d, hours in self.hours_by_day.items())
+
+    @property
+    def days(self) -> list[str]:
+        return list(self.hours_by_day)
+
+    def hours_for(self, day: str) -> tuple[str, ...]:
+        return self.hours_by_day.get(day, ())
+
+    def as_mapping(self) -> dict[str, list[str]]:
+        return {d: list(hours) for d, hours in self.hours_by_day.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class Funding:
+    """Sparsowana odpowiedź funding_settings/{day}."""
+
+    daily_cents: int | None = None
+    monthly_cents: int | None = None
+
+    @classmethod
+    def from_api(cls, payload: Any) -> Funding:
+        fs = _as_dict(_as_dict(payload).get("funding_setting"))
+        avail = _as_dict(fs.get("available_fundings"))
+        return cls(_as_int(avail.get("daily_cents")), _as_int(avail.get("monthly_cents")))
+
+
+@dataclass(frozen=True, slots=True)
+class MenuItem:
+    id: int
+    name: str
+    price_cents: int | None = None
+    category: str | None = None
+    description: str | None = None
+    available: bool = True
+
+    @classmethod
+    def from_api(cls, item: Any, category: str | None = None) -> MenuItem | None:
+        if not isinstance(item, dict) or (iid := _as_int(item.get("id"))) is None:
+            return None
+        cat = item.get("category")
+        if isinstance(cat, dict):
+            cat = cat.get("name_pl") or cat.get("name")
+        return cls(
+            iid,
+            str(item.get("name_pl") or item.get("name") or f"Danie {iid}"),
+            _as_int(item.get("price_cents")),
+            str(cat) if cat else category,
+            item.get("description_pl") or item.get("description") or None,
+            item.get("available", True) is not False and not item.get("sold_out"),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "price_cents": self.price_cents,
+            "category": self.category,
+            "description": self.description,
+            "available": self.available,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Menu:
+    """Sparsowane menu dla (miejsce, dzień); by_id to niemutowalny indeks id → pozycja.
+
+    Przy parsowaniu względem poprzedniej wersji niezmienione pozycje to TE SAME
+    obiekty co wcześniej, a `changed` zawiera id dodanych / zmienionych / usuniętych.
+    """
+
+    items: tuple[MenuItem, ...] = ()
+    by_id: Mapping[int, MenuItem] = field(
+        default_factory=lambda: MappingProxyType({}), compare=False, repr=False
+    )
+    changed: frozenset[int] = field(default=frozenset(), compare=False)
+
+    @classmethod
+    def from_items(cls, items: tuple[MenuItem, ...], changed: frozenset[int] = frozenset()) -> Menu:
+        return cls(items, MappingProxyType({i.id: i for i in items}), changed)
+
+    @classmethod
+    def from_api(cls, payload: Any, previous: Menu | None = None) -> Menu:
+        """menu_items (płasko) albo menu_categories[].menu_items; porównanie z `previous` per pozycja."""
+        payload = _as_dict(payload)
+        raw: list[tuple[Any, str | None]] = [(i, None) for i in _as_list(payload.get("menu_items"))]
+        for cat in _as_list(payload.get("menu_categories")):
+            cat = _as_dict(cat)
+            name = cat.get("name_pl") or cat.get("name")
+            raw.extend((i, str(name) if name else None) for i in _as_list(cat.get("menu_items")))
+
+        old = previous.by_id if previous is not None else {}
+        items: list[MenuItem] = []
+        changed: set[int] = set()
+        for raw_item, category in raw:
+            item = MenuItem.from_api(raw_item, category)
+            if item is None:
+                continue
+            prev = old.get(item.id)
+            if prev == item:
+                item = prev
+            else:
+                changed.add(item.id)
+            items.append(item)
+        if previous is not None:
+            changed.update(set(old) - {i.id for i in items})
+        return cls.from_items(tuple(items), frozenset(changed))
+
+    def get(self, item_id: int | None) -> MenuItem | None:
+        return self.by_id.get(item_id) if item_id is not None else None
+
+    def as_list(self) -> list[dict[str, Any]]:
+        return [i.as_dict() for i in self.items]
@@ -0,0 +1,124 @@
+# custom_components/smart_lunch/planner.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import CASCADE_DEBOUNCE
+from .coordinator import CASCADE_DEPENDENCIES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _topological_order(graph: dict[str, tuple[str, ...]]) -> list[str]:
+    order: list[str] = []
+    seen: set[str] = set()
+
+    def _visit(node: str) -> None:
+        if node in seen:
+            return
+        seen.add(node)
+        for child in graph.get(node, ()):
+            _visit(child)
+        order.append(node)
+
+    for node in graph:
+        _visit(node)
+    order.reverse()
+    return order
+
+
+class SmartLunchRefreshPlanner:
+    """Plan odświeżeń zależnych koordynatorów selectów (miejsce → dni → godziny).
+
+    Zmiany z okna CASCADE_DEBOUNCE są łączone w jeden plan: tylko węzły w dół
+    grafu od zmienionych źródeł, w kolejności topologicznej, każdy raz.
+    Nowy plan przerywa trwający – jego nieukończone węzły przechodzą do nowego.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: dict[str, DataUpdateCoordinator],
+        graph: dict[str, tuple[str, ...]] = CASCADE_DEPENDENCIES,
+    ) -> None:
+        self.hass = hass
+        self._coordinators = coordinators
+        self._graph = graph
+        self._order = _topological_order(graph)
+        self._pending: set[str] = set()
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._task: asyncio.Task | None = None
+        self._current: str | None = None
+        self._remaining: list[str] = []
+
+    def downstream(self, sources: Iterable[str]) -> list[str]:
+        """Koordynatory do przeliczenia po zmianie źródeł (kolejność topologiczna)."""
+        affected: set[str] = set()
+        stack = list(sources)
+        while stack:
+            for child in self._graph.get(stack.pop(), ()):
+                if child not in affected:
+                    affected.add(child)
+                    stack.append(child)
+        return [n for n in self._order if n in affected and n in self._coordinators]
+
+    def is_refreshing(self, name: str) -> bool:
+        """Czy węzeł odświeża się właśnie w ramach trwającego planu (jego zależne są już w planie)."""
+        return self._current == name and self._task is not None and not self._task.done()
+
+    @callback
+    def async_schedule(self, sources: Iterable[str]) -> None:
+        nodes = self.downstream(sources)
+        if not nodes:
+            return
+        running = self._task is not None and not self._task.done()
+        if running and not self._pending and set(nodes) <= set(self._remaining):
+            # węzły jeszcze nie wystartowały w trwającym planie – przeczytają nowe wejścia
+            return
+        self._pending.update(nodes)
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._unsub_timer = async_call_later(self.hass, CASCADE_DEBOUNCE, self._async_start)
+
+    @callback
+    def _async_start(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        nodes = set(self._pending)
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            # przerwij nieaktualny plan; węzeł w toku i nieukończone liczymy od nowa
+            nodes.update(self._remaining)
+            if self._current is not None:
+                nodes.add(self._current)
+            self._task.cancel()
+        plan = [n for n in self._order if n in nodes]
+        _LOGGER.debug("Plan odświeżeń: %s", plan)
+        self._remaining = list(plan)
+        self._current = None
+        self._task = self.hass.async_create_background_task(
+            self._async_run(self._remaining), "smart_lunch_refresh_plan"
+        )
+
+    async def _async_run(self, remaining: list[str]) -> None:
+        while remaining:
+            name = remaining.pop(0)
+            self._current = name
+            await self._coordinators[name].async_refresh()
+        self._current = None
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
@@ -0,0 +1,95 @@
+# custom_components/smart_lunch/polling.py
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from typing import TYPE_CHECKING, Callable, Mapping, Sequence
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    POLL_HOT_DIVISOR,
+    POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL,
+    POLL_NIGHT_END,
+    POLL_NIGHT_START,
+    POLL_NON_DELIVERY_FACTOR,
+    POLL_ORDER_LEAD,
+    POLL_UNCHANGED_AFTER,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import SmartLunchCoordinator
+
+
+def _parse_hour(value: str) -> time | None:
+    try:
+        hh, mm = value.split(":", 1)
+        return time(int(hh), int(mm[:2]))
+    except (ValueError, AttributeError):
+        return None
+
+
+def delivery_window(local_now: datetime, hours: Sequence[str]) -> tuple[datetime, datetime] | None:
+    """Okno „gorącego” odpytywania dla dnia dostawy: [pierwsza godzina − POLL_ORDER_LEAD, ostatnia]."""
+    parsed = sorted(t for t in (_parse_hour(h) for h in hours) if t is not None)
+    if not parsed:
+        return None
+    tz = local_now.tzinfo
+    day = local_now.date()
+    start = datetime.combine(day, parsed[0], tz) - POLL_ORDER_LEAD
+    end = datetime.combine(day, parsed[-1], tz)
+    return start, end
+
+
+def adaptive_interval(
+    base: timedelta,
+    now: datetime,
+    by_day: Mapping[str, Sequence[str]] | None,
+    unchanged_streak: int = 0,
+    hot: bool = True,
+) -> timedelta:
+    """
+    Interwał odpytywania z kalendarza dostaw:
+    - dziś dzień dostawy i jesteśmy w oknie przed/w trakcie dostaw → base / POLL_HOT_DIVISOR
+    - noc → POLL_MAX_INTERVAL; dzień bez dostaw → base × POLL_NON_DELIVERY_FACTOR
+    - długo bez zmian → podwajanie (do POLL_MAX_INTERVAL)
+    Poza oknem nigdy nie śpimy dłużej niż do jego początku.
+    """
+    local = dt_util.as_local(now)
+    hours_today = (by_day or {}).get(local.date().isoformat()) or []
+    window = delivery_window(local, hours_today) if hours_today else None
+
+    if hot and window and window[0] <= local <= window[1]:
+        return max(POLL_MIN_INTERVAL, base / POLL_HOT_DIVISOR)
+
+    if local.hour >= POLL_NIGHT_START or local.hour < POLL_NIGHT_END:
+        interval = POLL_MAX_INTERVAL
+    elif not hours_today:
+        interval = base * POLL_NON_DELIVERY_FACTOR
+    else:
+        interval = base
+
+    if unchanged_streak >= POLL_UNCHANGED_AFTER:
+        interval *= 2 ** min(unchanged_streak - POLL_UNCHANGED_AFTER + 1, 4)
+    interval = min(interval, POLL_MAX_INTERVAL)
+
+    # obudź się najpóźniej na początek dzisiejszego okna dostaw
+    if hot and window and local < window[0]:
+        interval = min(interval, max(POLL_MIN_INTERVAL, window[0] - local))
+    return interval
+
+
+class AdaptivePollingPolicy:
+    """Polityka interwałów dla SmartLunchCoordinator – źródłem jest kalendarz dat/godzin dostaw."""
+
+    def __init__(self, delivery_schedule: Callable[[], Mapping[str, Sequence[str]] | None]) -> None:
+        self._delivery_schedule = delivery_schedule
+
+    def __call__(self, coordinator: SmartLunchCoordinator) -> timedelta:
+        return adaptive_interval(
+            coordinator.base_interval,
+            dt_util.utcnow(),
+            self._delivery_schedule(),
+            coordinator.unchanged_streak,
+            hot=coordinator.poll_hot,
+        )
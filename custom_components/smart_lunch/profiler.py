@@ -0,0 +1,212 @@
+# custom_components/smart_lunch/profiler.py
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import deque
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Any, Iterator
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    PROFILE_LAG_PROBE_INTERVAL,
+    PROFILE_MAX_EVENTS,
+    PROFILE_TOP_ALLOCATIONS,
+    PROFILE_TOP_EVENTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_NOT_PROFILING = nullcontext()
+
+
+def measure(
+    profiler: SmartLunchProfiler | None, kind: str, name: str, extra: dict[str, Any] | None = None
+) -> AbstractContextManager[None]:
+    """Punkt pomiarowy: poza sesją profilowania zwraca współdzielony nullcontext."""
+    if profiler is None or not profiler.active:
+        return _NOT_PROFILING
+    return profiler._measure(kind, name, extra)
+
+
+def _summary(durations: list[float]) -> dict[str, Any]:
+    ordered = sorted(durations)
+    return {
+        "count": len(ordered),
+        "total_ms": round(sum(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+class SmartLunchProfiler:
+    """Ograniczony ślad zdarzeń integracji na żądanie (serwis smart_lunch.profile).
+
+    Jeden na domenę (hass.data[DOMAIN][DATA_PROFILER]). Poza sesją profilowania
+    punkty pomiarowe (measure) kończą się na sprawdzeniu `active`.
+    """
+
+    def __init__(self) -> None:
+        self.active = False
+        self._started = 0.0
+        self._events: deque[tuple[float, str, str, float, dict[str, Any] | None]] = deque(
+            maxlen=PROFILE_MAX_EVENTS
+        )
+        self._dropped = 0
+        self._lag: list[float] = []
+
+    def record(self, kind: str, name: str, duration: float, extra: dict[str, Any] | None = None) -> None:
+        """kind: refresh / request / decode / state_write; duration w sekundach."""
+        if not self.active:
+            return
+        if len(self._events) == self._events.maxlen:
+            self._dropped += 1
+        self._events.append((time.perf_counter() - self._started, kind, name, duration * 1000, extra))
+
+    @contextmanager
+    def _measure(self, kind: str, name: str, extra: dict[str, Any] | None = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - started, extra)
+
+    async def async_run(self, hass: HomeAssistant, duration: float, memory: bool) -> dict[str, Any]:
+        """Zbierz ślad przez `duration` s (opcjonalnie z tracemalloc) i zwróć raport."""
+        if self.active:
+            raise HomeAssistantError("Profilowanie Smart Lunch już trwa")
+        # tracemalloc (start, migawki, porównanie) w executorze – blokowałby mierzoną pętlę zdarzeń
+        own_tracing = False
+        before: tracemalloc.Snapshot | None = None
+        if memory:
+            own_tracing, before = await hass.async_add_executor_job(_start_tracing)
+
+        self._events.clear()
+        self._dropped = 0
+        self._lag = []
+        self._started = time.perf_counter()
+        started_at = dt_util.utcnow()
+        self.active = True
+        probe = asyncio.get_running_loop().create_task(self._async_probe_lag())
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.active = False
+            probe.cancel()
+
+        report: dict[str, Any] = {
+            "started": started_at.isoformat(),
+            "duration_s": duration,
+            "events_recorded": len(self._events),
+            "events_dropped": self._dropped,
+            "event_loop_lag": _summary(self._lag) if self._lag else None,
+            "by_kind": self._by_kind(),
+            "slowest": [
+                {"t_s": round(t, 3), "kind": kind, "name": name, "ms": round(ms, 3), **(extra or {})}
+                for t, kind, name, ms, extra in sorted(self._events, key=lambda e: e[3], reverse=True)[
+                    :PROFILE_TOP_EVENTS
+                ]
+            ],
+            "entries": _entry_footprint(hass),
+        }
+        if before is not None:
+            report["memory"] = await hass.async_add_executor_job(_finish_tracing, before, own_tracing)
+        self._events.clear()
+        return report
+
+    def _by_kind(self) -> dict[str, dict[str, Any]]:
+        grouped: dict[str, dict[str, list[float]]] = {}
+        for _, kind, name, ms, _ in self._events:
+            grouped.setdefault(kind, {}).setdefault(name, []).append(ms)
+        return {
+            kind: {name: _summary(values) for name, values in sorted(names.items())}
+            for kind, names in sorted(grouped.items())
+        }
+
+    async def _async_probe_lag(self) -> None:
+        """Opóźnienie pętli zdarzeń: o ile później niż zaplanowano budzi się sleep()."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + PROFILE_LAG_PROBE_INTERVAL
+            await asyncio.sleep(PROFILE_LAG_PROBE_INTERVAL)
+            self._lag.append(max(0.0, loop.time() - expected) * 1000)
+
+
+def _start_tracing() -> tuple[bool, tracemalloc.Snapshot]:
+    """(czy włączyliśmy tracemalloc sami, migawka początkowa) – w executorze."""
+    own_tracing = not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    return own_tracing, tracemalloc.take_snapshot()
+
+
+def _finish_tracing(before: tracemalloc.Snapshot, own_tracing: bool) -> dict[str, Any]:
+    """Migawka końcowa + raport; wyłącz tracemalloc, jeśli to my go włączyliśmy – w executorze."""
+    try:
+        return _memory_report(before, tracemalloc.take_snapshot())
+    finally:
+        if own_tracing:
+            tracemalloc.stop()
+
+
+def _memory_report(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> dict[str, Any]:
+    """Przyrost alokacji w plikach integracji między początkiem a końcem okna."""
+    only_ours = [tracemalloc.Filter(True, os.path.join(_PACKAGE_DIR, "*"))]
+    diff = after.filter_traces(only_ours).compare_to(before.filter_traces(only_ours), "lineno")
+    current = after.filter_traces(only_ours).statistics("filename")
+    return {
+        "integration_bytes": sum(stat.size for stat in current),
+        "by_file": {
+            os.path.relpath(stat.traceback[0].filename, _PACKAGE_DIR): stat.size for stat in current
+        },
+        "top_growth": [
+            {
+                "where": f"{os.path.relpath(stat.traceback[0].filename, _PACKAGE_DIR)}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+            }
+            for stat in diff[:PROFILE_TOP_ALLOCATIONS]
+        ],
+    }
+
+
+def _entry_footprint(hass: HomeAssistant) -> dict[str, Any]:
+    """Rozmiar struktur trzymanych per entry (liczba wpisów cache, próbek metryk)."""
+    out: dict[str, Any] = {}
+    for entry_id, data in hass.data.get(DOMAIN, {}).items():
+        if not isinstance(data, dict) or "client" not in data:
+            continue
+        client = data["client"]
+        out[entry_id] = {
+            **client.footprint(),
+            "delivery_dates_cached": len(data["delivery_dates"]) if "delivery_dates" in data else 0,
+            "funding_days_cached": len(data["funding_cache"]) if "funding_cache" in data else 0,
+            "menus_cached": len(data["menu_cache"]) if "menu_cache" in data else 0,
+            "ledger_days": len(data["ledger"]) if "ledger" in data else 0,
+        }
+    return out
+
+
+async def async_handle_profile(hass: HomeAssistant, profiler: SmartLunchProfiler, call: ServiceCall) -> ServiceResponse:
+    """Serwis smart_lunch.profile: ślad + opcjonalny tracemalloc, raport do config/ i w odpowiedzi."""
+    report = await profiler.async_run(hass, call.data["duration"], call.data["memory"])
+    filename = hass.config.path(f"{DOMAIN}_profile_{dt_util.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+
+    def _write() -> None:
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+    await hass.async_add_executor_job(_write)
+    _LOGGER.info("Raport profilowania Smart Lunch: %s", filename)
+    return {"file": filename, **report}
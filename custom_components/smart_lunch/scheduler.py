@@ -0,0 +1,126 @@
+# custom_components/smart_lunch/scheduler.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from .const import (
+    SCHEDULER_BURST,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_MIN_RATE,
+    SCHEDULER_RATE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HostScheduler:
+    """Limiter dla jednego hosta: token bucket + limit współbieżności + sprawiedliwa kolejka.
+
+    Oczekujący są kolejkowani per właściciel (entry) i obsługiwani round-robin,
+    więc jedno konto z serią zapytań nie zagłodzi pozostałych. Po 429 tempo
+    spada o połowę (do SCHEDULER_MIN_RATE), a udane odpowiedzi powoli je przywracają.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = SCHEDULER_RATE,
+        burst: int = SCHEDULER_BURST,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+    ) -> None:
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self._tokens = float(burst)
+        self._updated: float | None = None
+        self._active = 0
+        self._queues: dict[str, deque[asyncio.Future]] = {}
+        self._owners: deque[str] = deque()  # właściciele z oczekującymi, w kolejności round-robin
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    def _refill(self, now: float) -> None:
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @asynccontextmanager
+    async def slot(self, owner: str) -> AsyncIterator[None]:
+        """Poczekaj na swoją kolej (token + wolny slot), zwolnij slot po zapytaniu."""
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        queue = self._queues.setdefault(owner, deque())
+        if not queue:
+            self._owners.append(owner)
+        queue.append(fut)
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot został już przydzielony – oddaj go
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._owners and self._active < self.max_concurrency:
+            self._refill(loop.time())
+            if self._tokens < 1:
+                if self._wakeup is None:
+                    delay = (1 - self._tokens) / self.rate
+                    self._wakeup = loop.call_later(delay, self._on_wakeup)
+                return
+            owner = self._owners.popleft()
+            queue = self._queues[owner]
+            fut = queue.popleft()
+            if queue:
+                self._owners.append(owner)
+            else:
+                del self._queues[owner]
+            if fut.done():  # anulowany w kolejce
+                continue
+            self._tokens -= 1
+            self._active += 1
+            fut.set_result(None)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def report(self, status: int) -> None:
+        """Adaptacja tempa: 429 → zwolnij (×0.5), sukces → powolny powrót do bazowego."""
+        if status == 429:
+            new_rate = max(SCHEDULER_MIN_RATE, self.rate / 2)
+            if new_rate != self.rate:
+                _LOGGER.debug("%s: 429 – zwalniam do %.2f req/s", self.host, new_rate)
+            self.rate = new_rate
+            self._tokens = min(self._tokens, 0.0)
+        elif status < 400 and self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+
+class SmartLunchRequestScheduler:
+    """Wspólny dla domeny (hass.data[DOMAIN]) harmonogram zapytań: osobny limiter per host."""
+
+    def __init__(self) -> None:
+        self._hosts: dict[str, HostScheduler] = {}
+
+    def host(self, host: str) -> HostScheduler:
+        scheduler = self._hosts.get(host)
+        if scheduler is None:
+            scheduler = self._hosts[host] = HostScheduler(host)
+        return scheduler
@@ -0,0 +1,127 @@
+# custom_components/smart_lunch/selection.py
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Iterable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    OPT_SELECTED_DAY,
+    OPT_SELECTED_HOUR,
+    OPT_SELECTED_MENU_ITEM,
+    OPT_SELECTED_PLACE_ID,
+    SELECTION_SAVE_DELAY,
+    SELECTION_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SELECTION_FIELDS = (OPT_SELECTED_PLACE_ID, OPT_SELECTED_DAY, OPT_SELECTED_HOUR, OPT_SELECTED_MENU_ITEM)
+
+
+class SmartLunchSelection:
+    """Lokalne wybory entry (miejsce / dzień / godzina / danie) we własnym Store.
+
+    Zamiast async_update_entry (zapis całego core.config_entries + wszystkie
+    update listenery) zmiana trafia do pamięci, zapis na dysk jest opóźniony
+    i łączony, a słuchacze dostają sygnał tylko dla pól, które obserwują.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SELECTION_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.selection"
+        )
+        self._data: dict[str, Any] = {}
+        self._listeners: list[tuple[frozenset[str], Callable[[set[str]], None]]] = []
+
+    async def async_load(self) -> None:
+        """Wczytaj wybory; przy pierwszym starcie przenieś je z entry.options (stary format)."""
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.debug("Nie udało się wczytać wyborów: %s", e)
+            stored = None
+        if stored is not None:
+            self._data = {k: stored.get(k) for k in SELECTION_FIELDS}
+            return
+
+        legacy = {k: self.entry.options[k] for k in SELECTION_FIELDS if k in self.entry.options}
+        self._data = {k: legacy.get(k) for k in SELECTION_FIELDS}
+        if legacy:
+            self._store.async_delay_save(self._data_to_save, SELECTION_SAVE_DELAY)
+            self.hass.config_entries.async_update_entry(
+                self.entry,
+                options={k: v for k, v in self.entry.options.items() if k not in SELECTION_FIELDS},
+            )
+
+    def get(self, key: str) -> Any:
+        return self._data.get(key)
+
+    @property
+    def place_id(self) -> int | None:
+        pid = self._data.get(OPT_SELECTED_PLACE_ID)
+        try:
+            return int(pid) if pid is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def day(self) -> str | None:
+        return self._data.get(OPT_SELECTED_DAY) or None
+
+    @property
+    def hour(self) -> str | None:
+        return self._data.get(OPT_SELECTED_HOUR) or None
+
+    @property
+    def menu_item_id(self) -> int | None:
+        iid = self._data.get(OPT_SELECTED_MENU_ITEM)
+        try:
+            return int(iid) if iid is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+    @callback
+    def async_update(self, patch: dict[str, Any]) -> set[str]:
+        """Scal zmiany; zapis opóźniony, sygnał tylko dla zmienionych pól. Zwraca zmienione pola."""
+        changed = {k for k, v in patch.items() if k in SELECTION_FIELDS and self._data.get(k) != v}
+        if not changed:
+            return changed
+        for key in changed:
+            self._data[key] = patch[key]
+        self._store.async_delay_save(self._data_to_save, SELECTION_SAVE_DELAY)
+        for fields, listener in list(self._listeners):
+            if fields & changed:
+                listener(changed)
+        return changed
+
+    @callback
+    def async_add_listener(
+        self, fields: Iterable[str], listener: Callable[[set[str]], None]
+    ) -> CALLBACK_TYPE:
+        """Słuchacz zmian wybranych pól (wywoływany synchronicznie ze zbiorem zmienionych pól)."""
+        item = (frozenset(fields), listener)
+        self._listeners.append(item)
+
+        @callback
+        def _remove() -> None:
+            if item in self._listeners:
+                self._listeners.remove(item)
+
+        return _remove
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return dict(self._data)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -2,26 +2,25 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta, date, datetime
+from datetime import datetime
+from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any
+from typing import Any, Callable
 
 from yarl import URL
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import DOMAIN
-from .api import decode_remember_token_expiry  # dekodowanie expiry z cookie
+from .entity import SmartLunchCoordinatorEntity
 
 _LOGGER = logging.getLogger(__name__)
 PARALLEL_UPDATES = 0
@@ -29,7 +28,6 @@ PARALLEL_UPDATES = 0
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
-    client = data["client"]
 
     # --- przygotuj device_info: z hass.data albo fallback z entry.data ---
     device_info = data.get("device_info")
@@ -45,92 +43,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             "configuration_url": f"{URL(base)}",
         }
 
-    # ---- KOORDYNATOR: FUNDING (zapyta API) ----
-    async def _async_update_funding() -> dict[str, Any]:
-        try:
-            today = date.today().isoformat()
-            payload = await client.fetch_funding_for_day(today)
-            fs = (payload or {}).get("funding_setting") or {}
-            avail = fs.get("available_fundings") or {}
-            return {
-                "daily_cents": avail.get("daily_cents"),
-                "monthly_cents": avail.get("monthly_cents"),
-                "raw": payload,
-                "source_day": today,
-            }
-        except Exception as e:
-            raise UpdateFailed(str(e)) from e
-
-    funding_coordinator = DataUpdateCoordinator(
-        hass,
-        logger=_LOGGER,
-        name="smart_lunch_funding",
-        update_method=_async_update_funding,
-        update_interval=timedelta(minutes=30),
-    )
-    await funding_coordinator.async_config_entry_first_refresh()
-
-    # ---- KOORDYNATOR: TOKEN EXPIRY (bez sieci – tylko odczyt cookie) ----
-    async def _async_update_token() -> dict[str, Any]:
-        try:
-            jar = {c.key: c.value for c in client.session.cookie_jar}
-            token = jar.get("remember_user_token")
-            exp: datetime | None = decode_remember_token_expiry(token) if token else None
-            return {"expiry": exp}
-        except Exception as e:
-            _LOGGER.debug("Token expiry update failed: %s", e)
-            return {"expiry": None}
-
-    token_coordinator = DataUpdateCoordinator(
-        hass,
-        logger=_LOGGER,
-        name="smart_lunch_token_expiry",
-        update_method=_async_update_token,
-        update_interval=timedelta(minutes=5),
-    )
-    await token_coordinator.async_config_entry_first_refresh()
-
-    # ---- KOORDYNATOR: DOMYŚLNA LOKALIZACJA (zawsze z serwera) ----
-    async def _async_update_default_place() -> dict[str, Any]:
-        try:
-            # wymagane metody w api.py:
-            #   - fetch_delivery_places()
-            #   - choose_default_delivery_place_id(dp_json)
-            dp = await client.fetch_delivery_places()
-            default_id = client.choose_default_delivery_place_id(dp)
-            default_name = None
-            if default_id is not None:
-                for comp in dp.get("companies_delivery_places", []):
-                    for loc in comp.get("delivery_places", []):
-                        if loc.get("id") == default_id:
-                            default_name = loc.get("name_pl") or loc.get("name") or f"Place {default_id}"
-                            break
-            return {
-                "default_id": default_id,
-                "default_name": default_name,
-                "raw": dp,
-            }
-        except Exception as e:
-            raise UpdateFailed(str(e)) from e
-
-    default_place_coordinator = DataUpdateCoordinator(
-        hass,
-        logger=_LOGGER,
-        name="smart_lunch_default_place",
-        update_method=_async_update_default_place,
-        update_interval=timedelta(minutes=15),
-    )
-    await default_place_coordinator.async_config_entry_first_refresh()
+    # Koordynatory tworzy __init__ (wspólny, równoległy start dla całego entry)
+    funding_coordinator = data["funding_coordinator"]
+    token_coordinator = data["token_coordinator"]
+    default_place_coordinator = data["places_coordinator"]
 
     entities = [
         SmartLunchMonthlyFundingRemainingSensor(funding_coordinator, entry, device_info),
         SmartLunchTokenExpirySensor(token_coordinator, entry, device_info),
         SmartLunchDefaultPlaceSensor(default_place_coordinator, entry, device_info),  # NOWA encja
     ]
+    metrics_coordinator = data.get("metrics_coordinator")
+    if metrics_coordinator is not None:
+        entities.extend(
+            SmartLunchMetricSensor(metrics_coordinator, entry, device_info, description)
+            for description in METRIC_SENSORS
+        )
     async_add_entities(entities)
 
 
-class SmartLunchMonthlyFundingRemainingSensor(CoordinatorEntity, SensorEntity):
+def _cents_to_pln(cents: Any) -> float:
+    return float((Decimal(int(cents)) / Decimal(100)).quantize(Decimal("0.01")))
+
+
+class SmartLunchMonthlyFundingRemainingSensor(SmartLunchCoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
     _attr_name = "Portfel"
     _attr_icon = "mdi:cash"
@@ -148,42 +84,37 @@ class SmartLunchMonthlyFundingRemainingSensor(CoordinatorEntity, SensorEntity):
     def device_info(self) -> dict:
         return self._device_info
 
-    @property
-    def available(self) -> bool:
-        data = self.coordinator.data or {}
-        return data.get("monthly_cents") is not None
-
-    @property
-    def native_value(self):
-        data = self.coordinator.data or {}
-        cents = data.get("monthly_cents")
-        if cents is None:
-            return None
-        pln = (Decimal(int(cents)) / Decimal(100)).quantize(Decimal("0.01"))
-        return float(pln)
-
-    @property
-    def extra_state_attributes(self):
-        data = self.coordinator.data or {}
+    def _build_view(self, data: dict[str, Any]) -> tuple[float | None, dict[str, Any]]:
+        """(stan, atrybuty) – konwersje Decimal raz na aktualizację koordynatora."""
         daily_cents = data.get("daily_cents")
         monthly_cents = data.get("monthly_cents")
         attrs = {
             "source_day": data.get("source_day"),
             "daily_cents": daily_cents,
             "monthly_cents": monthly_cents,
+            "stale": bool(data.get("stale")),  # dane ze snapshotu, czekają na odświeżenie
         }
         if daily_cents is not None:
-            attrs["daily_limit_pln"] = float(
-                (Decimal(int(daily_cents)) / Decimal(100)).quantize(Decimal("0.01"))
-            )
-        if monthly_cents is not None:
-            attrs["monthly_remaining_pln"] = float(
-                (Decimal(int(monthly_cents)) / Decimal(100)).quantize(Decimal("0.01"))
-            )
-        return attrs
+            attrs["daily_limit_pln"] = _cents_to_pln(daily_cents)
+        monthly_pln = _cents_to_pln(monthly_cents) if monthly_cents is not None else None
+        if monthly_pln is not None:
+            attrs["monthly_remaining_pln"] = monthly_pln
+        return monthly_pln, attrs
+
+    @property
+    def available(self) -> bool:
+        return self.view[0] is not None
+
+    @property
+    def native_value(self):
+        return self.view[0]
+
+    @property
+    def extra_state_attributes(self):
+        return self.view[1]
 
 
-class SmartLunchTokenExpirySensor(CoordinatorEntity, SensorEntity):
+class SmartLunchTokenExpirySensor(SmartLunchCoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
     _attr_name = "Token ważny do"
     _attr_icon = "mdi:timer-sand-complete"
@@ -213,10 +144,14 @@ class SmartLunchTokenExpirySensor(CoordinatorEntity, SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        return {}
+        data = self.coordinator.data or {}
+        return {
+            "expired": bool(data.get("expired")),
+            "stale": bool(data.get("stale")),
+        }
 
 
-class SmartLunchDefaultPlaceSensor(CoordinatorEntity, SensorEntity):
+class SmartLunchDefaultPlaceSensor(SmartLunchCoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
     _attr_name = "Domyślna lokalizacja"
     _attr_icon = "mdi:map-marker-check"
@@ -249,4 +184,134 @@ class SmartLunchDefaultPlaceSensor(CoordinatorEntity, SensorEntity):
         data = self.coordinator.data or {}
         return {
             "default_id": data.get("default_id"),
-        }
\ No newline at end of file
+            "stale": bool(data.get("stale")),
+        }
+
+
+# ---------------------------------
+# Metryki API (diagnostyczne)
+# ---------------------------------
+
+def _per_endpoint(field: str) -> Callable[[dict[str, Any]], dict[str, Any]]:
+    def _attrs(data: dict[str, Any]) -> dict[str, Any]:
+        return {name: stats.get(field) for name, stats in (data.get("endpoints") or {}).items()}
+    return _attrs
+
+
+@dataclass(frozen=True, kw_only=True)
+class SmartLunchMetricDescription(SensorEntityDescription):
+    value_fn: Callable[[dict[str, Any]], Any]
+    attrs_fn: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+
+
+METRIC_SENSORS: tuple[SmartLunchMetricDescription, ...] = (
+    SmartLunchMetricDescription(
+        key="api_requests",
+        name="Zapytania API",
+        icon="mdi:api",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("requests"),
+        attrs_fn=_per_endpoint("requests"),
+    ),
+    SmartLunchMetricDescription(
+        key="api_latency_p50",
+        name="Opóźnienie API p50",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda d: d.get("latency_p50_ms"),
+        attrs_fn=_per_endpoint("latency_p50_ms"),
+    ),
+    SmartLunchMetricDescription(
+        key="api_latency_p95",
+        name="Opóźnienie API p95",
+        icon="mdi:timer-alert-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda d: d.get("latency_p95_ms"),
+        attrs_fn=_per_endpoint("latency_p95_ms"),
+    ),
+    SmartLunchMetricDescription(
+        key="api_errors",
+        name="Błędy API",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("errors"),
+        attrs_fn=lambda d: {"statuses": d.get("statuses"), **_per_endpoint("errors")(d)},
+    ),
+    SmartLunchMetricDescription(
+        key="api_retries",
+        name="Ponowienia API",
+        icon="mdi:refresh",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("retries"),
+        attrs_fn=_per_endpoint("retries"),
+    ),
+    SmartLunchMetricDescription(
+        key="api_cache_hits",
+        name="Trafienia cache API",
+        icon="mdi:cached",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("cache_hits"),
+        attrs_fn=lambda d: d.get("cache_hits_by_kind") or {},
+    ),
+    SmartLunchMetricDescription(
+        key="api_bytes_received",
+        name="Pobrane dane API",
+        icon="mdi:download-network-outline",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("bytes_received"),
+        attrs_fn=_per_endpoint("bytes_received"),
+    ),
+    SmartLunchMetricDescription(
+        key="refresh_failures",
+        name="Nieudane odświeżenia",
+        icon="mdi:sync-alert",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda d: d.get("refresh_failures"),
+        attrs_fn=lambda d: {
+            "failures": d.get("refresh_failures_by_coordinator") or {},
+            "refreshes": d.get("refreshes") or {},
+        },
+    ),
+)
+
+
+class SmartLunchMetricSensor(SmartLunchCoordinatorEntity, SensorEntity):
+    """Sensor diagnostyczny z metryk klienta API (liczniki od startu entry)."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: SmartLunchMetricDescription
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        entry: ConfigEntry,
+        device_info: dict,
+        description: SmartLunchMetricDescription,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._device_info = device_info
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+
+    def _build_view(self, data: dict[str, Any]) -> tuple[Any, dict[str, Any]]:
+        attrs_fn = self.entity_description.attrs_fn
+        return self.entity_description.value_fn(data), (attrs_fn(data) if attrs_fn else {})
+
+    @property
+    def device_info(self) -> dict:
+        return self._device_info
+
+    @property
+    def native_value(self):
+        return self.view[0]
+
+    @property
+    def extra_state_attributes(self):
+        return self.view[1]
@@ -0,0 +1,106 @@
+# custom_components/smart_lunch/session.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .api import SmartLunchClient, decode_remember_token_expiry
+from .const import CONF_PASSWORD, SESSION_RENEW_MARGIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SmartLunchSessionManager:
+    """Ciche odnawianie sesji: przed wygaśnięciem remember_user_token i po 401/403/419.
+
+    Działa tylko, gdy użytkownik zgodził się zapamiętać hasło (CONF_PASSWORD w entry.data).
+    Współbieżne żądania odnowienia są łączone w jedno logowanie; nowe ciastka trafiają
+    do działającego klienta i do entry.data bez przeładowania integracji.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, client: SmartLunchClient) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.client = client
+        self._renew_task: asyncio.Task | None = None
+        self._unsub_timer: Callable[[], None] | None = None
+
+    @property
+    def can_renew(self) -> bool:
+        return bool(self.entry.data.get(CONF_PASSWORD))
+
+    def token_expiry(self) -> datetime | None:
+        """Wygaśnięcie tokenu: z ostatniego logowania albo z zapisanego ciastka."""
+        if self.client.auth.token_exp:
+            return self.client.auth.token_exp
+        token = (self.entry.data.get("cookies") or {}).get("remember_user_token")
+        return decode_remember_token_expiry(token) if token else None
+
+    @callback
+    def async_start(self) -> None:
+        """Podepnij się pod klienta (401 → odnowienie) i zaplanuj odnowienie z wyprzedzeniem."""
+        self.client.set_session_renewer(self.async_renew)
+        self._schedule_renewal()
+
+    @callback
+    def async_stop(self) -> None:
+        self.client.set_session_renewer(None)
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._renew_task and not self._renew_task.done():
+            self._renew_task.cancel()
+
+    @callback
+    def _schedule_renewal(self) -> None:
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        exp = self.token_expiry()
+        if exp is None or not self.can_renew:
+            return
+        when = max(exp - SESSION_RENEW_MARGIN, dt_util.utcnow() + timedelta(seconds=5))
+        self._unsub_timer = async_track_point_in_utc_time(self.hass, self._on_renew_timer, when)
+
+    @callback
+    def _on_renew_timer(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        self.entry.async_create_background_task(
+            self.hass, self.async_renew(), "smart_lunch_session_renew"
+        )
+
+    async def async_renew(self) -> bool:
+        """Jedno logowanie dla wszystkich współbieżnych wołających; True = nowa sesja działa."""
+        if not self.can_renew:
+            return False
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = self.hass.async_create_task(self._async_do_renew())
+        try:
+            return await asyncio.shield(self._renew_task)
+        except Exception as e:
+            _LOGGER.debug("Ciche odnowienie sesji nieudane: %s", e)
+            return False
+
+    async def _async_do_renew(self) -> bool:
+        self.client.set_password(self.entry.data.get(CONF_PASSWORD))
+        try:
+            tokens: dict[str, Any] = await self.client.login()
+        finally:
+            self.client.set_password(None)  # hasło tylko na czas logowania
+
+        cookies = tokens.get("cookies", {})
+        self.client.attach_cookies(cookies)
+        new_data = dict(self.entry.data)
+        new_data["cookies"] = cookies
+        new_data["remember_exp"] = tokens.get("remember_exp")
+        self.hass.config_entries.async_update_entry(self.entry, data=new_data)
+        _LOGGER.debug("Sesja SmartLunch odnowiona, ważna do %s", tokens.get("remember_exp"))
+        self._schedule_renewal()
+        return True
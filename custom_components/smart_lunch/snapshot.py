@@ -0,0 +1,131 @@
+# custom_components/smart_lunch/snapshot.py
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .cache import DeliveryDatesCache
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+from .coordinator import build_places_data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _dump_places(data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "options": [[pid, name] for pid, name in data.get("options") or []],
+        "server_default_id": data.get("server_default_id"),
+    }
+
+
+def _load_places(stored: dict[str, Any]) -> dict[str, Any]:
+    options = [(int(pid), name) for pid, name in stored.get("options") or []]
+    return build_places_data(options, stored.get("server_default_id"))
+
+
+def _dump_token(data: dict[str, Any]) -> dict[str, Any]:
+    exp: datetime | None = data.get("expiry")
+    return {"expiry": exp.isoformat() if exp else None}
+
+
+def _load_token(stored: dict[str, Any]) -> dict[str, Any]:
+    exp = datetime.fromisoformat(stored["expiry"]) if stored.get("expiry") else None
+    return {"expiry": exp, "expired": exp is not None and exp <= dt_util.utcnow()}
+
+
+def _dump_plain(data: dict[str, Any]) -> dict[str, Any]:
+    # surowe payloady nie trafiają na dysk – tylko pola potrzebne encjom
+    return {k: v for k, v in data.items() if k not in ("raw", "stale")}
+
+
+def _load_plain(stored: dict[str, Any]) -> dict[str, Any]:
+    return dict(stored)
+
+
+# koordynator → (serializacja, deserializacja)
+_CODECS = {
+    "places_coordinator": (_dump_places, _load_places),
+    "funding_coordinator": (_dump_plain, _load_plain),
+    "token_coordinator": (_dump_token, _load_token),
+    "day_coordinator": (_dump_plain, _load_plain),
+    "hour_coordinator": (_dump_plain, _load_plain),
+}
+
+
+class SmartLunchSnapshot:
+    """Ostatnie dobre dane entry w Store – ciepły start bez czekania na sieć.
+
+    Zapisy są opóźnione i łączone (async_delay_save), więc seria odświeżeń
+    koordynatorów kończy się jednym zapisem na dysk.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot"
+        )
+        self._coordinators: dict[str, DataUpdateCoordinator] = {}
+        self._dates_cache: DeliveryDatesCache | None = None
+
+    async def async_restore(
+        self, coordinators: dict[str, DataUpdateCoordinator], dates_cache: DeliveryDatesCache
+    ) -> bool:
+        """Wypełnij koordynatory i cache dat ze snapshotu (oznaczone jako stale). True = coś wczytano."""
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.debug("Nie udało się wczytać snapshotu: %s", e)
+            return False
+        if not stored:
+            return False
+
+        restored = False
+        for name, (_, load) in _CODECS.items():
+            item = (stored.get("coordinators") or {}).get(name)
+            if item is None or name not in coordinators:
+                continue
+            try:
+                data = load(item)
+            except Exception as e:
+                _LOGGER.debug("Pominięto uszkodzony snapshot %s: %s", name, e)
+                continue
+            data["stale"] = True  # do pierwszego udanego odświeżenia z serwera
+            coordinators[name].data = data
+            restored = True
+        dates_cache.restore(stored.get("delivery_dates") or {})
+        return restored
+
+    @callback
+    def async_track(
+        self, coordinators: dict[str, DataUpdateCoordinator], dates_cache: DeliveryDatesCache
+    ) -> list:
+        """Zapisuj snapshot po każdej aktualizacji koordynatorów; zwraca funkcje odpinające."""
+        self._coordinators = coordinators
+        self._dates_cache = dates_cache
+        return [c.async_add_listener(self._schedule_save) for c in coordinators.values()]
+
+    @callback
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for name, (dump, _) in _CODECS.items():
+            coordinator = self._coordinators.get(name)
+            data = coordinator.data if coordinator else None
+            if data:
+                out[name] = dump(data)
+        return {
+            "coordinators": out,
+            "delivery_dates": self._dates_cache.dump() if self._dates_cache is not None else {},
+        }
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()